@@ -3,6 +3,16 @@ RUNNING_STATUS = "running"
 TERMINATED_STATUS = "terminated"
 WAITING_STATUS = "waiting"
 
+# Batch scoring partition states
+BATCH_SUCCEEDED_STATUS = "succeeded"
+BATCH_FAILED_STATUS = "failed"
+BATCH_RUNNING_STATUS = "running"
+
+
+# Container names inside the model deployment pod
+MODEL_SERVING_CONTAINER = "model-serving"
+AUTH_PROXY_CONTAINER = "auth-proxy"
+
 
 # Openshift resources requests/limits
 CPU_REQUEST = "100m"
@@ -11,9 +21,97 @@ MEM_REQUEST = "256Mi"
 MEM_LIMIT = "512Mi"
 
 
+# Auth proxy, cpu is scaled to the model serving container
+PROXY_CPU_SHARE = 0.25
+PROXY_MIN_CPU_LIMIT = 100
+PROXY_MIN_CPU_REQUEST = 10
+PROXY_MEM_REQUEST = "64Mi"
+PROXY_MEM_LIMIT = "128Mi"
+PROXY_WORKER_CONNECTIONS = "1024"
+PROXY_UPSTREAM_KEEPALIVE = "32"
+PROXY_BUFFERING = "on"
+
+
 # Misc default values
 GUNICORN_WORKERS = "1"
 
+
+# Multi-model serving: share of the memory limit the loaded models may use
+GUNICORN_THREADS = "4"
+MODEL_MEMORY_SHARE = 0.75
+MULTI_MODEL_LABEL = "mlflow-multi-model"
+MODELS_FILE = "models.json"
+
+
+# Idle policy, times in seconds. An idle timeout of 0 disables scaling to zero
+IDLE_TIMEOUT = "0"
+MIN_WARM_TIME = "600"
+# last request time is written at most once per interval to save API calls
+LAST_REQUEST_UPDATE_INTERVAL = 60
+
+IDLE_TIMEOUT_ANNOTATION = "mlflow-openshift/idle-timeout"
+MIN_WARM_TIME_ANNOTATION = "mlflow-openshift/min-warm-time"
+LAST_REQUEST_ANNOTATION = "mlflow-openshift/last-request"
+WOKEN_AT_ANNOTATION = "mlflow-openshift/woken-at"
+IDLE_SINCE_ANNOTATION = "mlflow-openshift/idle-since"
+IDLE_REPLICAS_ANNOTATION = "mlflow-openshift/idle-replicas"
+COLD_START_ANNOTATION = "mlflow-openshift/last-cold-start"
+
+# Warm-up: requests per gunicorn worker and pod before a deployment counts as ready
+WARM_UP_ROUNDS = 3
+WARM_UP_CONFIG_KEYS = ("warm_up", "warm_up_input")
+
+
+# Batch scoring
+BATCH_PARTITIONS = "4"
+
+
+# Local scoring: number of worker processes, 0 or 1 scores in-process
+LOCAL_WORKERS = "0"
+# smallest number of rows a worker process receives
+LOCAL_MIN_CHUNK_SIZE = 1000
+
+
+# Request policy of predict, times in seconds
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+REQUEST_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 10
+RETRY_STATUS_CODES = (502, 503, 504)
+# every request adds RETRY_BUDGET_RATIO retries to the budget, up to RETRY_BUDGET_MAX
+RETRY_BUDGET_RATIO = 0.1
+RETRY_BUDGET_MAX = 10
+HEDGE_QUANTILE = 0.95
+# hedging starts once enough latencies were observed
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 1000
+
+
+# Image pre-pull, times in seconds
+PRE_PULL_TIMEOUT = 900
+PRE_PULL_SLEEP_TIME = 5
+
+
+# Shadow traffic: candidate deployments are named <name>SHADOW_SUFFIX
+SHADOW_SUFFIX = "-shadow"
+SHADOW_OF_LABEL = "mlflow-shadow-of"
+SHADOW_ANNOTATION = "mlflow-openshift/shadow"
+# nginx resolves the mirror host on start up, so without candidate it points to
+# the serving container, like the default of the template
+SHADOW_DISABLED_HOST = "127.0.0.1:8080"
+# share of the live requests mirrored to the candidate
+SHADOW_SHARE = 0.1
+# promotion decision: the candidate p95 latency may be LATENCY_TOLERANCE slower,
+# its error rate ERROR_TOLERANCE higher and MAX_MISMATCH_RATE of the compared
+# rows may have different predictions
+SHADOW_LATENCY_TOLERANCE = 0.1
+SHADOW_ERROR_TOLERANCE = 0.01
+SHADOW_MAX_MISMATCH_RATE = 0.01
+SHADOW_MIN_REQUESTS = 100
+SHADOW_COMPARE_WORKERS = 4
+
+
 # TIMEOUT
 RETRIES = 10
 SLEEP_TIME = 10
@@ -1,16 +1,27 @@
+import copy
 import json
-import requests
 import ast
 import logging
 import os
+import random
+import time
 
 import numpy as np
 
 from mlflow.deployments import BaseDeploymentClient
 from mlflow.exceptions import MlflowException
 
-from mlflow_openshift.utils import set_config_defaults
+from mlflow_openshift.utils import set_config_defaults, pop_warm_up_config, \
+    build_warm_up_payload, get_model_uri, get_container, is_enabled
 from mlflow_openshift import oc_helper
+from mlflow_openshift.request_helper import RequestPolicy
+from mlflow_openshift.shadow_helper import ShadowComparison, SHADOWED_HEADER, \
+    summarize_requests, decide_promotion
+from mlflow_openshift.local_engine import LocalScoringEngine, local_deployments
+from mlflow_openshift.defaults import MODEL_SERVING_CONTAINER, LOCAL_WORKERS, BATCH_PARTITIONS, \
+    BATCH_SUCCEEDED_STATUS, BATCH_FAILED_STATUS, BATCH_RUNNING_STATUS, \
+    SHADOW_SUFFIX, SHADOW_ANNOTATION, SHADOW_SHARE, SHADOW_LATENCY_TOLERANCE, \
+    SHADOW_ERROR_TOLERANCE, SHADOW_MAX_MISMATCH_RATE, SHADOW_MIN_REQUESTS
 
 import openshift as oc
 
@@ -58,6 +69,11 @@ def target_help():
         "   For more advanced updates, please consider deleting the old deployment and creating a "
         "new one with the identical name.\n\n"
 
+        "mlflow deployments run-local \n"
+        "   Loads the model into a local scoring engine of the calling python process, "
+        "optionally with --config workers=<n> worker processes. Only useful with the python "
+        "API, where predict with the same name then scores the model locally.\n\n"
+
         "mlflow list/delete/get/predict \n"
         "   These additional functionalities are implemented according to the plugin definition "
         "and require no further explanation."
@@ -66,11 +82,32 @@ def target_help():
 
 
 def run_local(name, model_uri, flavor=None, config={}):
-    return NotImplementedError(
-        "Running model locally is not supported for the mlflow-openshift plugin.\n"
-        "Consider running the mlflow: `mlflow models predict --help` cli for local "
-        "batch predictions."
-    )
+    """Starts a local scoring engine for the model. Afterwards, `predict` of the
+    openshift client with the same *name* scores the model locally, without
+    deploying it to openshift.
+
+    Notes:
+        The engine lives in the calling python process, i.e. it is meant for the
+        python mlflow API and not for the mlflow CLI.
+        Special treatment for different model flavors are not implemented.
+
+    Args:
+        name (str): name of the local deployment
+        model_uri (str): path where to find the mlflow packed model
+        flavor (str, optional): mlflow deployment flavor. Defaults to None
+        config (dict, optional): config items for the local deployment. Defaults to {}
+            Optional `workers`: number of worker processes for CPU-bound models,
+            0 or 1 loads the model into the current process. Defaults to 0
+
+    Returns:
+        dict: {'name': <name>, 'flavor': <flavor>}
+    """
+    if name in local_deployments:
+        local_deployments.pop(name).shutdown()
+
+    workers = int((config or {}).get("workers", LOCAL_WORKERS))
+    local_deployments[name] = LocalScoringEngine(model_uri, workers)
+    return {'name': name, 'flavor': flavor}
 
 
 class OpenshiftAPIPlugin(BaseDeploymentClient):
@@ -79,12 +116,21 @@ class OpenshiftAPIPlugin(BaseDeploymentClient):
     def __init__(self, uri):
         super().__init__(uri)
         self.oc_project = oc_helper.get_project_name()
+        self.request_policy = RequestPolicy()
+        # prediction comparisons of the shadow candidates, collected by `predict`
+        self.shadow_comparisons = {}
+        self._pre_pull_template = os.path.join(
+            os.path.dirname(__file__), 'templates/pre_pull_image.yml')
+        self._proxy_conf_template = os.path.join(
+            os.path.dirname(__file__), 'templates/auth_proxy.conf')
 
     def create_deployment(self, name, model_uri, flavor=None, config={}):
         """Creates all necessary artifacts for a model deployment in openshift.
 
         Notes:
             special treatment for different model flavors are not implemented.
+            Only the difference to an already existing deployment with the same name
+            is applied. Re-running an unchanged deployment does not touch openshift.
 
         Args:
             name (str): name of the deployment
@@ -92,50 +138,212 @@ class OpenshiftAPIPlugin(BaseDeploymentClient):
             flavor (str, optional): mlflow deployment flavor. Defaults to None
             config (dict, optional): config items for the deployment. Defaults to {}
                 Necessary config items: image, docker_registry, tag
+                Optional `warm_up` sends synthetic requests built from the model's input
+                example or signature (or the dataframe `warm_up_input`) to every worker
+                before the deployment counts as ready.
+                Optional `pre_pull` pulls a new image onto all schedulable nodes before
+                the rollout.
+                The auth proxy is tuned with the `proxy_*` config items. With
+                `auth_proxy=false` it is left out, auth_user and auth_password are not
+                needed and authentication has to be terminated in front of the route.
 
         Raises:
-            mlflow_exception: if the deployment failed in openshift or not all
-                mandatory config items are provided
+            mlflow_exception: if the deployment failed in openshift, not all
+                mandatory config items are provided, `auth_proxy` differs from
+                the existing deployment or no warm-up input can be built from the model
 
         Returns:
-            dict: {'name': <name>, 'flavor': <flavor>}
+            dict: {'name': <name>, 'flavor': <flavor>, 'changes': <list of changes>,
+                'warm_up': <warm-up latencies or {'error': <message>}, only if
+                    warm-up was done>,
+                'pre_pull': <pull seconds per node, only if the image was pre-pulled>}
         """
-        if not all(key in config for key in (
-            "image", "docker_registry", "tag", "auth_user", "auth_password")):
+        auth_proxy = is_enabled(config.pop("auth_proxy", True))
+        mandatory_keys = ("image", "docker_registry", "tag")
+        if auth_proxy:
+            mandatory_keys += ("auth_user", "auth_password")
+        if not all(key in config for key in mandatory_keys):
             raise MlflowException(
-                "not all mandatory config items (image, docker_registry, tag) "
-                "are provided."
+                "not all mandatory config items ({}) are provided.".format(
+                    ", ".join(mandatory_keys))
+            )
+        live_dc = oc.selector("dc", labels={"app": name}).object(ignore_not_found=True)
+        if live_dc is not None and oc_helper.has_auth_proxy(live_dc.as_dict()) != auth_proxy:
+            # the diff never removes the proxy container, the deployment would be half migrated
+            raise MlflowException(
+                f"{name} already exists {'without' if auth_proxy else 'with'} an auth proxy, "
+                "delete the deployment first to switch auth_proxy"
             )
 
+        warm_up, warm_up_input = pop_warm_up_config(config)
+        # fail on an unusable warm-up input before anything is deployed
+        warm_up_payload = build_warm_up_payload(model_uri, warm_up_input) if warm_up else None
+        pre_pull = is_enabled(config.pop("pre_pull", False))
         config = set_config_defaults(config)
         template_path = os.path.join(
             os.path.dirname(__file__),
-            'templates/deploy_with_auth.yml'
+            'templates/deploy_with_auth.yml' if auth_proxy else 'templates/deploy_without_auth.yml'
         )
         config["NAME"] = name
         config["MODEL_URI"] = model_uri
-        oc_helper.apply_deployment_config(config, template_path)
+        if auth_proxy:
+            config["NGINX_CONF"] = oc_helper.render_proxy_conf(config, self._proxy_conf_template)
+            # keep mirroring requests to a running shadow candidate
+            config.update(oc_helper.get_shadow_parameters(name))
+
+        image = f"{config['DOCKER_REGISTRY']}/{config['IMAGE']}:{config['TAGVERSION']}"
+        if pre_pull and oc_helper.get_deployed_image(name) != image:
+            # the image is pulled while the template is processed
+            pre_pull_state = oc_helper.start_pre_pull(name, config, self._pre_pull_template)
+            desired_objs = oc_helper.render_template(config, template_path)
+            pre_pull_report = oc_helper.wait_for_pre_pull(pre_pull_state)
+        else:
+            desired_objs = oc_helper.render_template(config, template_path)
+            pre_pull_report = None
+
+        changes = oc_helper.apply_objects(desired_objs)
+        result = {'name': name, 'flavor': flavor, 'changes': changes}
+        if pre_pull_report is not None:
+            result['pre_pull'] = pre_pull_report
 
         try:
             route_host = oc_helper.get_route_name(name)
-            oc_helper.check_succesful_deployment(
-                name, route_host,
-                config["BASIC_AUTH_USERNAME"], config["BASIC_AUTH_PASSWORD"]
+            if oc_helper.is_rollout_triggered(changes):
+                oc_helper.check_succesful_deployment(
+                    name, route_host,
+                    config.get("BASIC_AUTH_USERNAME"), config.get("BASIC_AUTH_PASSWORD")
+                )
+        except MlflowException as mlflow_exception:
+            self.delete_deployment(name)
+            raise mlflow_exception
+
+        if warm_up_payload is not None and oc_helper.is_rollout_triggered(changes):
+            result['warm_up'] = self._warm_up(name, warm_up_payload)
+
+        logger.info("\n" + "Endpoint available under: " + route_host)
+        return result
+
+    def create_model_group(self, name, models, config={}):
+        """Creates a deployment serving several models from one pod, to share the
+        python runtime and memory between small models. Requests are routed by the
+        model name, models are loaded on first use and the least recently used ones
+        are evicted if the loaded models exceed `model_memory_budget`.
+
+        Notes:
+            Use `add_model` and `remove_model` to change the models without restarting
+            the group and `predict` with `<group name>/<model name>` to address a model.
+
+        Args:
+            name (str): name of the model group
+            models (dict): model name -> path where to find the mlflow packed model
+            config (dict, optional): config items for the deployment. Defaults to {}
+                Necessary config items: image, docker_registry, tag, auth_user,
+                auth_password. Optional: gunicorn_threads, model_memory_budget (MiB,
+                defaults to 75% of mem_limit) and the resource and idle config items
+                of `create_deployment`
+
+        Raises:
+            MlflowException: if the deployment failed in openshift or not all
+                mandatory config items are provided
+
+        Returns:
+            dict: {'name': <name>, 'models': <models>, 'changes': <list of changes>}
+        """
+        if not all(key in config for key in (
+                "image", "docker_registry", "tag", "auth_user", "auth_password")):
+            raise MlflowException(
+                "not all mandatory config items (image, docker_registry, tag) "
+                "are provided."
             )
+
+        config = set_config_defaults(config)
+        template_dir = os.path.join(os.path.dirname(__file__), 'templates')
+        with open(os.path.join(template_dir, 'multi_model_server.py')) as f:
+            config["SERVER_SCRIPT"] = f.read()
+        config["NGINX_CONF"] = oc_helper.render_proxy_conf(
+            config, self._proxy_conf_template, shadow=False)
+        config["NAME"] = name
+
+        # the pod mounts the model list, so it has to exist first
+        changes = oc_helper.set_group_models(name, models)
+        changes += oc_helper.apply_deployment_config(
+            config, os.path.join(template_dir, 'deploy_multi_model.yml'))
+
+        try:
+            route_host = oc_helper.get_route_name(name)
+            if oc_helper.is_rollout_triggered(changes):
+                oc_helper.check_succesful_deployment(
+                    name, route_host,
+                    config["BASIC_AUTH_USERNAME"], config["BASIC_AUTH_PASSWORD"]
+                )
         except MlflowException as mlflow_exception:
             self.delete_deployment(name)
             raise mlflow_exception
 
         logger.info("\n" + "Endpoint available under: " + route_host)
-        return {'name': name, 'flavor': flavor}
+        return {'name': name, 'models': models, 'changes': changes}
+
+    def add_model(self, group_name, model_name, model_uri):
+        """Adds a model to a model group or replaces the model uri of an existing
+        one. The other models of the group keep running.
+
+        Notes:
+            The running pods pick up the change with the next config map sync of
+            openshift, usually within a minute.
+
+        Args:
+            group_name (str): name of the model group
+            model_name (str): name of the model inside the group
+            model_uri (str): path where to find the mlflow packed model
+
+        Raises:
+            MlflowException: no model group with that name found
+
+        Returns:
+            dict: models of the group, model name -> model uri
+        """
+        models = oc_helper.get_group_models(group_name)
+        models[model_name] = model_uri
+        oc_helper.set_group_models(group_name, models)
+        return models
+
+    def remove_model(self, group_name, model_name):
+        """Removes a model from a model group. The other models of the group keep
+        running.
+
+        Args:
+            group_name (str): name of the model group
+            model_name (str): name of the model inside the group
+
+        Raises:
+            MlflowException: no model group or model with that name found
+
+        Returns:
+            dict: models of the group, model name -> model uri
+        """
+        models = oc_helper.get_group_models(group_name)
+        if model_name not in models:
+            raise MlflowException(f"No model with name: {model_name} in {group_name} found")
+        del models[model_name]
+        oc_helper.set_group_models(group_name, models)
+        return models
 
     def delete_deployment(self, name):
         """Deletes the deployment and resources (openshift artifacts like routes).
 
+        Notes:
+            A local deployment started by `run_local` is stopped instead.
+            Also deletes the jobs of a batch scoring run with that name and the
+            shadow candidate of the deployment.
+
         Args:
             name (str): name of the deployment
         """
+        if name in local_deployments:
+            local_deployments.pop(name).shutdown()
+            return
         oc_helper.delete_all_resources(name, self.oc_project)
+        self.shadow_comparisons.pop(name, None)
 
     def update_deployment(self, name, model_uri=None, flavor=None, config=None):
         """Updates an existing model deployment in openshift. It can either update
@@ -146,27 +354,52 @@ class OpenshiftAPIPlugin(BaseDeploymentClient):
             In case more configurations need to be changed, consider deleting and creating
             the deployment from scratch.
             Special treatment for different model flavors are not implemented.
+            Only the changed fields are patched. If nothing changed, no rollout is
+            triggered and the call returns immediately.
 
         Args:
             name (str): name of the deployment
             model_uri (str): path where to find the mlflow packed model
             flavor (str, optional): mlflow deployment flavor. Defaults to None
             config (dict, optional): config items for the deployment. Defaults to {}
+                Supports `warm_up`, `warm_up_input` and `pre_pull` like `create_deployment`
 
         Raises:
             MlflowException: if the updated deployment lead to an error in openshift
+                or no warm-up input can be built from the model
 
         Returns:
-            dict: {'name': <name>, 'flavor': <flavor>}
+            dict: {'name': <name>, 'flavor': <flavor>, 'changes': <list of changes>,
+                'warm_up': <warm-up latencies or {'error': <message>}, only if
+                    warm-up was done>,
+                'pre_pull': <pull seconds per node, only if the image was pre-pulled>}
         """
 
         if not model_uri and not config:
             raise MlflowException("Provide at least a new *model_uri* or *config*")
 
+        config = dict(config or {})
+        warm_up, warm_up_input = pop_warm_up_config(config)
+        pre_pull = is_enabled(config.pop("pre_pull", False))
+        pre_pull_state = None
+
         dc_obj = oc.selector("dc", labels={"app": name}).object()
+        if model_uri and oc_helper.is_model_group(dc_obj):
+            raise MlflowException(f"{name} is a model group, use add_model instead")
+        dc_dict = copy.deepcopy(dc_obj.as_dict())
+        # fail on an unusable warm-up input before anything is deployed
+        warm_up_payload = build_warm_up_payload(
+            model_uri or get_model_uri(dc_dict), warm_up_input) if warm_up else None
         if config:
             if all(key in config for key in ("image", "docker_registry", "tag")):
-                dc_obj = oc_helper.update_container_image(dc_obj, config)
+                dc_dict = oc_helper.update_container_image(dc_dict, config)
+                if pre_pull and oc_helper.get_deployed_image(name) != \
+                        get_container(dc_dict, MODEL_SERVING_CONTAINER)["image"]:
+                    pre_pull_state = oc_helper.start_pre_pull(name, {
+                        "DOCKER_REGISTRY": config["docker_registry"],
+                        "IMAGE": config["image"],
+                        "TAGVERSION": config["tag"]
+                    }, self._pre_pull_template)
             else:
                 raise MlflowException(
                     "Not all of the necessary *config* items for updating are provided. "
@@ -174,21 +407,254 @@ class OpenshiftAPIPlugin(BaseDeploymentClient):
                 )
 
         if model_uri:
-            dc_obj = oc_helper.update_model_uri(dc_obj, model_uri)
+            dc_dict = oc_helper.update_model_uri(dc_dict, model_uri)
+
+        pre_pull_report = None
+        if pre_pull_state is not None:
+            pre_pull_report = oc_helper.wait_for_pre_pull(pre_pull_state)
 
-        # hotfix for bug in openshift-client library -> normal apply()
-        dc_obj.modify_and_apply(lambda x: True, retries=0)
+        changes = oc_helper.apply_object_diff(dc_obj, dc_dict)
+        if not changes:
+            logger.info("\n" + f"Deployment {name} is already up to date")
+            return {'name': name, 'flavor': flavor, 'changes': changes}
+
+        if oc_helper.is_sleeping(dc_obj):
+            oc_helper.restore_replicas(dc_obj)
 
         route_host = oc_helper.get_route_name(name)
         auth_user, auth_password = oc_helper.get_authentication_info(name)
 
+        result = {'name': name, 'flavor': flavor, 'changes': changes}
+        if pre_pull_report is not None:
+            result['pre_pull'] = pre_pull_report
         try:
             oc_helper.check_succesful_deployment(name, route_host, auth_user, auth_password)
         except MlflowException as mlflow_exception:
             self.delete_deployment(name)
             raise mlflow_exception
 
-        return {'name': name, 'flavor': flavor}
+        if warm_up_payload is not None:
+            result['warm_up'] = self._warm_up(name, warm_up_payload)
+
+        return result
+
+    def _warm_up(self, name, payload):
+        # the deployment is ready without the warm-up, a failure is only reported
+        try:
+            return oc_helper.warm_up_deployment(name, payload)
+        except MlflowException as mlflow_exception:
+            logger.warning(mlflow_exception.message)
+            return {'error': mlflow_exception.message}
+
+    def create_shadow(self, name, model_uri=None, config=None):
+        """Deploys a candidate model or image next to a live deployment and mirrors a
+        share of the live requests to it. The responses of the candidate are discarded,
+        clients are only answered by the live deployment. Use `get_shadow_report` to
+        compare both and `promote_shadow` or `delete_shadow` to finish.
+
+        Notes:
+            The requests are mirrored by the auth proxy of the live deployment, which
+            is restarted for this. The candidate `<name>-shadow` is a copy of the live
+            deployment with the new model uri and/or image and no idle policy.
+            Requests sent by `predict` are mirrored by the client instead, which also
+            compares the predictions of both deployments.
+
+        Args:
+            name (str): name of the live deployment
+            model_uri (str, optional): path where to find the candidate mlflow packed model
+            config (dict, optional): config items for the candidate. Defaults to {}
+                `image`, `docker_registry` and `tag` change the image of the candidate.
+                Optional `share` of the mirrored requests (0.0001 to 1, rounded to
+                0.0001) and the thresholds of the promotion decision
+                `latency_tolerance` (p95), `error_tolerance`, `max_mismatch_rate`
+                and `min_requests`
+
+        Raises:
+            MlflowException: neither model uri nor image given, the deployment has no
+                auth proxy, already a shadow candidate or the candidate failed to start
+
+        Returns:
+            dict: {'name': <name>, 'candidate': <candidate name>, 'share': <share>,
+                'changes': <list of changes of the live deployment>}
+        """
+        config = dict(config or {})
+        image_config = all(key in config for key in ("image", "docker_registry", "tag"))
+        if not model_uri and not image_config:
+            raise MlflowException(
+                "Provide a candidate *model_uri* and/or the *config* items image, "
+                "docker_registry and tag"
+            )
+        # nginx split_clients accepts percentages with at most 2 decimal places
+        percent = round(float(config.get("share", SHADOW_SHARE)) * 100, 2)
+        if not 0 < percent <= 100:
+            raise MlflowException(
+                f"share has to be between 0.0001 and 1, got {config.get('share')}")
+        share = percent / 100
+
+        dc_obj = oc_helper.get_deployment_config(name)
+        if oc_helper.is_model_group(dc_obj):
+            raise MlflowException(f"{name} is a model group, shadow traffic is not supported")
+        if oc_helper.get_shadow(name, dc_obj) is not None:
+            raise MlflowException(
+                f"{name} already has a shadow candidate, promote or delete it first")
+        auth_user, auth_password = oc_helper.get_authentication_info(name, dc_obj)
+        if auth_user is None:
+            raise MlflowException(
+                f"{name} has no auth proxy, which is needed to mirror the requests")
+
+        candidate_dict = copy.deepcopy(dc_obj.as_dict())
+        if image_config:
+            candidate_dict = oc_helper.update_container_image(candidate_dict, config)
+        if model_uri:
+            candidate_dict = oc_helper.update_model_uri(candidate_dict, model_uri)
+
+        candidate = name + SHADOW_SUFFIX
+        oc_helper.create_shadow_objects(name, candidate, candidate_dict)
+        try:
+            candidate_route = oc_helper.get_route_name(candidate)
+            oc_helper.check_succesful_deployment(
+                candidate, candidate_route, auth_user, auth_password)
+        except MlflowException as mlflow_exception:
+            oc_helper.delete_shadow_resources(name)
+            raise mlflow_exception
+
+        shadow = {
+            'candidate': candidate,
+            'host': f"{candidate}:8087",
+            'route': candidate_route,
+            'share': share,
+            'percent': f"{percent:g}",
+            'latency_tolerance': float(
+                config.get("latency_tolerance", SHADOW_LATENCY_TOLERANCE)),
+            'error_tolerance': float(config.get("error_tolerance", SHADOW_ERROR_TOLERANCE)),
+            'max_mismatch_rate': float(
+                config.get("max_mismatch_rate", SHADOW_MAX_MISMATCH_RATE)),
+            'min_requests': int(config.get("min_requests", SHADOW_MIN_REQUESTS))
+        }
+        dc_dict = oc_helper.set_shadow_env(
+            copy.deepcopy(dc_obj.as_dict()), shadow['host'], shadow['percent'])
+        changes = oc_helper.apply_object_diff(dc_obj, dc_dict)
+        if oc_helper.is_sleeping(dc_obj):
+            oc_helper.restore_replicas(dc_obj)
+
+        try:
+            oc_helper.check_succesful_deployment(
+                name, oc_helper.get_route_name(name), auth_user, auth_password)
+        except MlflowException as mlflow_exception:
+            # the live deployment keeps serving without mirroring
+            oc_helper.apply_object_diff(
+                oc_helper.get_deployment_config(name), oc_helper.set_shadow_env(dc_dict))
+            oc_helper.wait_for_rollout(name)
+            oc_helper.delete_shadow_resources(name)
+            raise mlflow_exception
+
+        shadow['since'] = int(time.time())
+        dc_obj.annotate({SHADOW_ANNOTATION: json.dumps(shadow)}, refresh_model=False)
+        self.shadow_comparisons[name] = ShadowComparison()
+        return {'name': name, 'candidate': candidate, 'share': share, 'changes': changes}
+
+    def get_shadow_report(self, name):
+        """Compares a live deployment with its shadow candidate since the candidate
+        receives requests and decides if the candidate can be promoted.
+
+        Notes:
+            Latencies (of the model serving containers) and error rates are read from
+            the auth proxy logs of the running pods. Predictions are only compared for
+            requests sent by `predict` of this client.
+
+        Args:
+            name (str): name of the live deployment
+
+        Raises:
+            MlflowException: the deployment has no shadow candidate
+
+        Returns:
+            dict: {'name': <name>, 'candidate': <candidate name>,
+                'live': <requests, error_rate, p50, p95 and p99 of the live deployment>,
+                'shadow': <the same for the candidate>,
+                'predictions': <compared rows, mismatch_rate, mean/max_abs_diff, errors>,
+                'promote': <True if the candidate is within all thresholds>,
+                'reasons': <list of reasons against the promotion>}
+        """
+        shadow = oc_helper.get_shadow(name)
+        if shadow is None:
+            raise MlflowException(f"{name} has no shadow candidate")
+
+        live = summarize_requests(oc_helper.get_proxy_timings(name, shadow['since']))
+        candidate = summarize_requests(
+            oc_helper.get_proxy_timings(shadow['candidate'], shadow['since']))
+        predictions = self.shadow_comparisons.setdefault(name, ShadowComparison()).summary()
+        promote, reasons = decide_promotion(live, candidate, predictions, shadow)
+        return {
+            'name': name,
+            'candidate': shadow['candidate'],
+            'live': live,
+            'shadow': candidate,
+            'predictions': predictions,
+            'promote': promote,
+            'reasons': reasons
+        }
+
+    def promote_shadow(self, name):
+        """Replaces the model uri and image of a live deployment with the ones of its
+        shadow candidate, stops mirroring and deletes the candidate.
+
+        Args:
+            name (str): name of the live deployment
+
+        Raises:
+            MlflowException: the deployment has no shadow candidate or the promoted
+                deployment failed to start
+
+        Returns:
+            dict: {'name': <name>, 'changes': <list of changes>}
+        """
+        shadow = oc_helper.get_shadow(name)
+        if shadow is None:
+            raise MlflowException(f"{name} has no shadow candidate")
+
+        candidate_dict = oc_helper.get_deployment_config(shadow['candidate']).as_dict()
+        dc_obj = oc_helper.get_deployment_config(name)
+        dc_dict = copy.deepcopy(dc_obj.as_dict())
+        get_container(dc_dict, MODEL_SERVING_CONTAINER)["image"] = \
+            get_container(candidate_dict, MODEL_SERVING_CONTAINER)["image"]
+        dc_dict = oc_helper.update_model_uri(dc_dict, get_model_uri(candidate_dict))
+        dc_dict = oc_helper.set_shadow_env(dc_dict)
+
+        changes = oc_helper.apply_object_diff(dc_obj, dc_dict)
+        dc_obj.annotate({SHADOW_ANNOTATION: None}, refresh_model=False)
+        if oc_helper.is_sleeping(dc_obj):
+            oc_helper.restore_replicas(dc_obj)
+
+        auth_user, auth_password = oc_helper.get_authentication_info(name)
+        oc_helper.check_succesful_deployment(
+            name, oc_helper.get_route_name(name), auth_user, auth_password)
+        # the old pods mirror to the candidate until they are replaced
+        oc_helper.wait_for_rollout(name)
+        oc_helper.delete_shadow_resources(name)
+        self.shadow_comparisons.pop(name, None)
+        return {'name': name, 'changes': changes}
+
+    def delete_shadow(self, name):
+        """Stops mirroring requests to the shadow candidate of a live deployment and
+        deletes the candidate, once the auth proxy of the live deployment is restarted.
+        The live deployment is not changed otherwise.
+
+        Args:
+            name (str): name of the live deployment
+
+        Raises:
+            MlflowException: the rollout of the live deployment failed
+        """
+        dc_obj = oc_helper.get_deployment_config(name)
+        changes = oc_helper.apply_object_diff(
+            dc_obj, oc_helper.set_shadow_env(copy.deepcopy(dc_obj.as_dict())))
+        dc_obj.annotate({SHADOW_ANNOTATION: None}, refresh_model=False)
+        if changes:
+            # the old pods mirror to the candidate until they are replaced
+            oc_helper.wait_for_rollout(name)
+        oc_helper.delete_shadow_resources(name)
+        self.shadow_comparisons.pop(name, None)
 
     def list_deployments(self):
         """Lists all mlflow deployments in the current openshift project.
@@ -204,6 +670,109 @@ class OpenshiftAPIPlugin(BaseDeploymentClient):
         mlflow_deployments = oc.selector("dc", labels={"template": "mlflow"}).names()
         return mlflow_deployments
 
+    def scale_idle_deployments(self):
+        """Scales all mlflow deployments to zero that did not receive a request, via
+        `predict` or directly via their route, within their `idle_timeout` and are
+        running for at least their `min_warm_time`. Meant to be called periodically,
+        e.g. by a scheduled job. The number of replicas is restored on wake up.
+
+        Notes:
+            Only `predict` wakes up a sleeping deployment. Requests sent directly to
+            the route of a sleeping deployment fail until it is woken up. Requests
+            to the route are only seen for deployments with the auth proxy.
+
+        Returns:
+            list: names of the deployments that were scaled to zero
+        """
+        now = time.time()
+        scaled_down = []
+        for dc_obj in oc.selector("dc", labels={"template": "mlflow"}).objects():
+            if oc_helper.is_idle(dc_obj, now):
+                oc_helper.scale_to_zero(dc_obj)
+                scaled_down.append(dc_obj.name())
+        return scaled_down
+
+    def create_batch_job(self, name, model_uri, input_uri, output_uri, config={}):
+        """Scores all csv or parquet files under an s3 prefix with openshift jobs that
+        read from and write to s3 directly, bypassing the HTTP route. The files are
+        split into partitions, each scored in-process by its own job in parallel.
+        The predictions are written with the same file names under *output_uri*.
+
+        Args:
+            name (str): name of the batch scoring run
+            model_uri (str): path where to find the mlflow packed model
+            input_uri (str): s3 prefix of the input files, e.g. s3://bucket/input
+            output_uri (str): s3 prefix for the predictions, e.g. s3://bucket/output
+            config (dict, optional): config items for the jobs. Defaults to {}
+                Necessary config items: image, docker_registry, tag
+                Optional: partitions, cpu/memory limits/requests, backoff_limit
+
+        Raises:
+            MlflowException: not all mandatory config items are provided
+
+        Returns:
+            dict: {'name': <name>, 'partitions': <number of partitions>}
+        """
+        if not all(key in config for key in ("image", "docker_registry", "tag")):
+            raise MlflowException(
+                "not all mandatory config items (image, docker_registry, tag) "
+                "are provided."
+            )
+
+        partitions = int(config.pop("partitions", BATCH_PARTITIONS))
+        config = set_config_defaults(config)
+        template_dir = os.path.join(os.path.dirname(__file__), 'templates')
+        with open(os.path.join(template_dir, 'batch_score.py')) as f:
+            config["BATCH_SCRIPT"] = f.read()
+        config["NAME"] = name
+        config["MODEL_URI"] = model_uri
+        config["INPUT_URI"] = input_uri
+        config["OUTPUT_URI"] = output_uri
+        config["PARTITIONS"] = str(partitions)
+
+        oc_helper.create_batch_partitions(
+            config, os.path.join(template_dir, 'batch_scoring_job.yml'), range(partitions))
+        return {'name': name, 'partitions': partitions}
+
+    def get_batch_job(self, name):
+        """Retrieves the progress of a batch scoring run.
+
+        Args:
+            name (str): name of the batch scoring run
+
+        Raises:
+            MlflowException: no batch scoring run with that name found
+
+        Returns:
+            dict: {'name': <name>, 'partitions': {<index>: <status>},
+                'succeeded': <count>, 'failed': <count>, 'running': <count>}
+        """
+        partitions = oc_helper.get_batch_partitions(name)
+        result = {'name': name, 'partitions': partitions}
+        for status in (BATCH_SUCCEEDED_STATUS, BATCH_FAILED_STATUS, BATCH_RUNNING_STATUS):
+            result[status] = list(partitions.values()).count(status)
+        return result
+
+    def retry_batch_job(self, name, partitions=None):
+        """Reruns failed partitions of a batch scoring run, the other partitions
+        are not touched.
+
+        Args:
+            name (str): name of the batch scoring run
+            partitions (list, optional): indices of the partitions to rerun.
+                Defaults to all failed partitions
+
+        Returns:
+            list: indices of the partitions that were restarted
+        """
+        if partitions is None:
+            partitions = [
+                partition for partition, status in oc_helper.get_batch_partitions(name).items()
+                if status == BATCH_FAILED_STATUS
+            ]
+        oc_helper.retry_batch_partitions(name, partitions)
+        return sorted(partitions)
+
     def get_deployment(self, name):
         """Retrieves raw, detailed information for the deployment.
 
@@ -225,25 +794,63 @@ class OpenshiftAPIPlugin(BaseDeploymentClient):
     def predict(self, deployment_name, df):
         """Makes predictions using the specified deployment name. This can be used for
         making batch predictions using the openshift infrastrucutre, e.g. in automated
-        daily/weekly pipelines.
+        daily/weekly pipelines. A deployment that was scaled to zero by the idle policy
+        is scaled up and the request is sent once it is ready. Local deployments
+        started by `run_local` are scored in the local scoring engine.
+
+        Notes:
+            Timeouts, retries and hedged requests are configured by `self.request_policy`,
+            see `mlflow_openshift.request_helper.RequestPolicy`.
+            If the deployment has a shadow candidate (see `create_shadow`), the share of
+            requests is sent to the candidate in the background and the predictions
+            are compared. The candidate does not change the returned predictions.
 
         Args:
-            deployment_name (str): name of the deployment
+            deployment_name (str): name of the deployment, `<group name>/<model name>`
+                for a model of a model group
             df (pd.DataFrame): dataframe with the correct format the model expects
 
+        Raises:
+            MlflowException: the request failed or timed out
+
         Returns:
-            np.ndarray: array containing the predictions
+            np.ndarray: array containing the predictions, one dict per row for
+                models that predict a dataframe
         """
-        auth_user, auth_password = oc_helper.get_authentication_info(deployment_name)
+        if deployment_name in local_deployments:
+            return local_deployments[deployment_name].predict(df)
+
+        # <group name>/<model name> addresses a model of a model group
+        deployment_name, _, model_name = deployment_name.partition("/")
+        path = f"models/{model_name}/invocations" if model_name else "invocations"
+
+        # the deployment config is retrieved once for all helpers
+        dc_obj = oc_helper.get_deployment_config(deployment_name)
+        auth_user, auth_password = oc_helper.get_authentication_info(deployment_name, dc_obj)
         route_host = oc_helper.get_route_name(deployment_name)
+        oc_helper.wake_deployment(
+            deployment_name, route_host, auth_user, auth_password, dc_obj)
+
+        headers = {'Content-Type': 'application/json'}
+        shadow = None if model_name else oc_helper.get_shadow(deployment_name, dc_obj)
+        if shadow is not None:
+            # predict mirrors its requests itself to compare the predictions
+            headers[SHADOWED_HEADER] = "client"
 
         # send to https model deployment
         payload = df.to_dict(orient='split')
-        response = requests.post(
-            "https://{0}/invocations".format(route_host),
-            headers={'Content-Type': 'application/json'},
-            auth=(auth_user, auth_password),
-            data=json.dumps(payload)
+        auth = (auth_user, auth_password) if auth_user else None
+        data = json.dumps(payload)
+        response = self.request_policy.post(
+            "https://{0}/{1}".format(route_host, path),
+            headers=headers,
+            auth=auth,
+            data=data
         )
         list_response = ast.literal_eval(response.content.decode("utf-8"))
-        return np.array(list_response)
+        predictions = np.array(list_response)
+
+        if shadow is not None and random.random() < shadow['share']:
+            self.shadow_comparisons.setdefault(deployment_name, ShadowComparison()).submit(
+                f"https://{shadow['route']}/invocations", auth, data, predictions)
+        return predictions
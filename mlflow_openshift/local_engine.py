@@ -0,0 +1,96 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import mlflow.pyfunc
+
+from mlflow_openshift.defaults import LOCAL_MIN_CHUNK_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+# local deployments of this python process, name -> LocalScoringEngine
+local_deployments = {}
+
+# model loaded once per worker process, model_uri -> pyfunc model
+_worker_models = {}
+
+
+def _load_worker_model(model_uri):
+    if model_uri not in _worker_models:
+        _worker_models[model_uri] = mlflow.pyfunc.load_model(model_uri)
+    return os.getpid()
+
+
+def _predict_worker(model_uri, df):
+    _load_worker_model(model_uri)
+    return _to_array(_worker_models[model_uri].predict(df))
+
+
+def _to_array(predictions):
+    # same result as `predict` of a deployment, whose scoring server sends
+    # dataframe predictions as records, i.e. an array with one dict per row
+    if isinstance(predictions, pd.DataFrame):
+        return np.array(predictions.to_dict(orient="records"))
+    return np.asarray(predictions)
+
+
+class LocalScoringEngine:
+    """Scores a mlflow model on the local machine without any HTTP overhead.
+
+    The model is either loaded into the current process or, for CPU-bound
+    models, into a pool of worker processes that score chunks of the input
+    dataframe in parallel.
+
+    Args:
+        model_uri (str): path where to find the mlflow packed model
+        workers (int, optional): number of worker processes, 0 or 1 scores
+            in-process. Defaults to 0
+    """
+
+    def __init__(self, model_uri, workers=0):
+        self.model_uri = model_uri
+        self.workers = workers
+
+        start = time.monotonic()
+        if workers > 1:
+            self._model = None
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+            # loads the model in the workers up front instead of on the first request
+            list(self._pool.map(_load_worker_model, [model_uri] * workers))
+        else:
+            self._model = mlflow.pyfunc.load_model(model_uri)
+            self._pool = None
+        logger.info(f"Loaded {model_uri} locally in {time.monotonic() - start:.1f} seconds")
+
+    def predict(self, df):
+        """Makes predictions for the dataframe.
+
+        Args:
+            df (pd.DataFrame): dataframe with the correct format the model expects
+
+        Returns:
+            np.ndarray: array containing the predictions, one dict per row for
+                models that predict a dataframe
+        """
+        if self._pool is None:
+            return _to_array(self._model.predict(df))
+
+        n_chunks = min(self.workers, max(1, len(df) // LOCAL_MIN_CHUNK_SIZE))
+        if n_chunks == 1:
+            return self._pool.submit(_predict_worker, self.model_uri, df).result()
+
+        chunk_size = -(-len(df) // n_chunks)
+        chunks = [df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size)]
+        predictions = list(self._pool.map(
+            _predict_worker, [self.model_uri] * len(chunks), chunks))
+        return np.concatenate(predictions)
+
+    def shutdown(self):
+        """Stops the worker processes, if there are any."""
+        if self._pool is not None:
+            self._pool.shutdown()
@@ -1,9 +1,12 @@
+import calendar
+import copy
+import json
 import requests
+import string
 import time
 import logging
 import yaml
 import datetime
-import pathlib
 
 import openshift as oc
 from openshift.model import OpenShiftPythonException
@@ -11,9 +14,16 @@ from openshift.model import OpenShiftPythonException
 from mlflow.exceptions import MlflowException
 
 from mlflow_openshift.defaults import RUNNING_STATUS, TERMINATED_STATUS, \
-    WAITING_STATUS
+    WAITING_STATUS, MODEL_SERVING_CONTAINER, AUTH_PROXY_CONTAINER, \
+    BATCH_SUCCEEDED_STATUS, BATCH_FAILED_STATUS, BATCH_RUNNING_STATUS, \
+    MULTI_MODEL_LABEL, MODELS_FILE, SHADOW_OF_LABEL, SHADOW_ANNOTATION, SHADOW_DISABLED_HOST
+from mlflow_openshift.utils import diff_objects, get_container, copy_object
+from mlflow_openshift.shadow_helper import parse_timing_logs
 
-from .defaults import RETRIES, SLEEP_TIME
+from .defaults import RETRIES, SLEEP_TIME, LAST_REQUEST_UPDATE_INTERVAL, WARM_UP_ROUNDS, \
+    PRE_PULL_TIMEOUT, PRE_PULL_SLEEP_TIME, \
+    IDLE_TIMEOUT_ANNOTATION, MIN_WARM_TIME_ANNOTATION, LAST_REQUEST_ANNOTATION, \
+    WOKEN_AT_ANNOTATION, IDLE_SINCE_ANNOTATION, IDLE_REPLICAS_ANNOTATION, COLD_START_ANNOTATION
 
 
 logger = logging.getLogger(__name__)
@@ -28,21 +38,453 @@ def get_project_name():
     return oc.get_project_name()
 
 
-def apply_deployment_config(config, template):
-    """Applies given arguments to openshift template and deploys it.
+def render_template(config, template):
+    """Processes the openshift template with the given parameters without applying it.
+    Config items that are no parameters of the template are ignored.
 
     Args:
-        param_string (str): contains string representation of openshift parameters,
-            e.g. --param=NAME=<some-name>
+        config (dict): template parameters, e.g. {"NAME": <some-name>}
         template (str): filepath to openshift deployment template yaml.
+
+    Returns:
+        list: openshift.apiobject.APIObject for every object of the template
     """
-    package_path = pathlib.Path(__file__).parent.absolute()
-    with open(f"{package_path}/templates/deploy_with_auth.yml") as f:
+    with open(template) as f:
         template_dict = yaml.safe_load(f)
     template_obj = oc.APIObject(template_dict)
 
-    processed_template = template_obj.process(parameters=config)
-    oc.apply(processed_template)
+    parameter_names = {parameter["name"] for parameter in template_dict["parameters"]}
+    parameters = {k: v for k, v in config.items() if k in parameter_names}
+    return template_obj.process(parameters=parameters)
+
+
+def render_proxy_conf(config, template, shadow=True):
+    """Renders the nginx config of the auth proxy with the proxy config items.
+
+    Args:
+        config (dict): config items with the `PROXY_*` defaults already set
+        template (str): filepath to the nginx config template
+        shadow (bool, optional): keep the blocks that mirror requests to a shadow
+            candidate. Defaults to True
+
+    Returns:
+        str: nginx config, the `$SHADOW_*` variables are substituted by the container
+    """
+    with open(template) as f:
+        lines = f.read().splitlines(keepends=True)
+
+    conf = []
+    in_shadow_block = False
+    for line in lines:
+        marker = line.strip()
+        if marker in ("# shadow-begin", "# shadow-end"):
+            in_shadow_block = marker == "# shadow-begin"
+        elif not line.startswith("#") and (shadow or not in_shadow_block):
+            conf.append(line)
+
+    parameters = {k: v for k, v in config.items() if k.startswith("PROXY_")}
+    return string.Template("".join(conf)).safe_substitute(parameters)
+
+
+def apply_deployment_config(config, template):
+    """Applies given arguments to openshift template and deploys only the difference
+    to the objects already present in openshift.
+
+    Args:
+        config (dict): template parameters, e.g. {"NAME": <some-name>}
+        template (str): filepath to openshift deployment template yaml.
+
+    Returns:
+        list: changes that were applied, see `apply_object_diff`
+    """
+    return apply_objects(render_template(config, template))
+
+
+def apply_objects(desired_objs):
+    """Deploys only the difference of the rendered objects to the objects already
+    present in openshift.
+
+    Args:
+        desired_objs (list): openshift.apiobject.APIObject rendered from a template
+
+    Returns:
+        list: changes that were applied, see `apply_object_diff`
+    """
+    changes = []
+    for desired_obj in desired_objs:
+        live_obj = oc.selector(desired_obj.qname()).object(ignore_not_found=True)
+        desired = desired_obj.as_dict()
+
+        if live_obj is not None and is_sleeping(live_obj):
+            # a sleeping deployment is only woken up if something besides replicas changed
+            asleep = copy.deepcopy(desired)
+            asleep["spec"].pop("replicas", None)
+            if not diff_objects(live_obj.as_dict(), asleep)[1]:
+                continue
+            mark_awake(live_obj)
+
+        changes += apply_object_diff(live_obj, desired)
+    return changes
+
+
+def apply_object_diff(live_obj, desired):
+    """Patches a live openshift object with the minimal difference to its desired
+    state or creates it, if it does not exist yet. Nothing is sent to openshift
+    if the object is already up to date.
+
+    Args:
+        live_obj (openshift.apiobject.APIObject): object present in openshift or None
+        desired (dict): desired state of the object
+
+    Returns:
+        list: dictionaries with keys `resource` and `field` for every changed field,
+            e.g. [{'resource': 'deploymentconfig/x', 'field': 'spec.replicas'}].
+            `field` is None for created objects. Values are left out, as they
+            contain secrets like credentials in env variables.
+    """
+    if live_obj is None:
+        qname = oc.create(desired).qname()
+        logger.info(f"Created {qname}")
+        return [{"resource": qname, "field": None}]
+
+    field_changes, patch = diff_objects(live_obj.as_dict(), desired)
+    if not patch:
+        return []
+
+    live_obj.patch(patch)
+    changes = []
+    for field, _, _ in field_changes:
+        logger.info(f"Changed {live_obj.qname()}: {field}")
+        changes.append({"resource": live_obj.qname(), "field": field})
+    return changes
+
+
+def get_deployment_config(name):
+    """Retrieves the deployment config of the openshift application.
+
+    Args:
+        name (str): name of the openshift application
+
+    Raises:
+        MlflowException: deployment config not found
+
+    Returns:
+        openshift.apiobject.APIObject: containing the deployment config
+    """
+    try:
+        return oc.selector("dc", labels={"app": name}).object()
+    except OpenShiftPythonException:
+        raise MlflowException(f"could not find deployment config for {name}")
+
+
+def is_sleeping(dc_obj):
+    """Checks if the deployment was scaled to zero by the idle policy.
+
+    Args:
+        dc_obj (openshift.apiobject.APIObject): deployment config
+
+    Returns:
+        bool: True if the deployment is scaled to zero because of inactivity
+    """
+    return bool(dc_obj.get_annotation(IDLE_SINCE_ANNOTATION)) and \
+        dc_obj.model.spec.replicas == 0
+
+
+def is_idle(dc_obj, now):
+    """Checks if a running deployment exceeded its idle timeout and its
+    minimum warm time. Requests sent via `predict` as well as requests sent
+    directly to the route, as logged by the auth proxy, count as activity.
+
+    Args:
+        dc_obj (openshift.apiobject.APIObject): deployment config
+        now (float): current time as unix timestamp
+
+    Returns:
+        bool: True if the deployment can be scaled to zero
+    """
+    idle_timeout = int(dc_obj.get_annotation(IDLE_TIMEOUT_ANNOTATION, if_missing="0"))
+    if idle_timeout <= 0 or dc_obj.model.spec.replicas == 0:
+        return False
+
+    created = calendar.timegm(time.strptime(
+        dc_obj.model.metadata.creationTimestamp, "%Y-%m-%dT%H:%M:%SZ"))
+    last_request = int(dc_obj.get_annotation(LAST_REQUEST_ANNOTATION, if_missing=created))
+    woken_at = int(dc_obj.get_annotation(WOKEN_AT_ANNOTATION, if_missing=created))
+    min_warm_time = int(dc_obj.get_annotation(MIN_WARM_TIME_ANNOTATION, if_missing="0"))
+
+    if now - last_request < idle_timeout or now - woken_at < min_warm_time:
+        return False
+    return not get_proxy_timings(dc_obj.name(), now - idle_timeout)
+
+
+def scale_to_zero(dc_obj):
+    """Scales the deployment to zero replicas and marks it as sleeping. The
+    number of replicas is kept to restore it on wake up.
+
+    Args:
+        dc_obj (openshift.apiobject.APIObject): deployment config
+    """
+    dc_obj.annotate({
+        IDLE_SINCE_ANNOTATION: str(int(time.time())),
+        IDLE_REPLICAS_ANNOTATION: str(dc_obj.model.spec.replicas)
+    }, refresh_model=False)
+    dc_obj.self_selector().scale(0)
+    logger.info(f"Scaled idle deployment {dc_obj.name()} to zero")
+
+
+def mark_awake(dc_obj):
+    """Removes the sleeping mark of the idle policy before the deployment is scaled up.
+
+    Args:
+        dc_obj (openshift.apiobject.APIObject): deployment config
+
+    Returns:
+        int: number of replicas before the deployment was scaled to zero
+    """
+    replicas = int(dc_obj.get_annotation(IDLE_REPLICAS_ANNOTATION, if_missing="1"))
+    now = str(int(time.time()))
+    dc_obj.annotate({
+        IDLE_SINCE_ANNOTATION: None,
+        IDLE_REPLICAS_ANNOTATION: None,
+        WOKEN_AT_ANNOTATION: now,
+        LAST_REQUEST_ANNOTATION: now
+    }, refresh_model=False)
+    return max(replicas, 1)
+
+
+def restore_replicas(dc_obj):
+    """Scales a deployment, that was scaled to zero by the idle policy, back to
+    the number of replicas it had before.
+
+    Args:
+        dc_obj (openshift.apiobject.APIObject): deployment config
+    """
+    replicas = mark_awake(dc_obj)
+    dc_obj.self_selector().scale(replicas)
+
+
+def wake_deployment(name, route_host, auth_user, auth_password, dc_obj=None):
+    """Scales a deployment up, if it was scaled to zero by the idle policy, and waits
+    until the model endpoint is ready. Otherwise only the time of the last request
+    is updated.
+
+    Args:
+        name (str): name of the openshift application
+        route_host (str): url of the model endpoint
+        auth_user (str): username for the route
+        auth_password (str): password for the route
+        dc_obj (openshift.apiobject.APIObject, optional): deployment config, if
+            already retrieved. Defaults to None
+
+    Returns:
+        float: cold start latency in seconds, None if the deployment was running
+    """
+    if dc_obj is None:
+        dc_obj = get_deployment_config(name)
+    now = int(time.time())
+
+    if not is_sleeping(dc_obj):
+        if int(dc_obj.get_annotation(IDLE_TIMEOUT_ANNOTATION, if_missing="0")) > 0:
+            last_request = int(dc_obj.get_annotation(LAST_REQUEST_ANNOTATION, if_missing="0"))
+            if now - last_request >= LAST_REQUEST_UPDATE_INTERVAL:
+                dc_obj.annotate({LAST_REQUEST_ANNOTATION: str(now)}, refresh_model=False)
+        return None
+
+    start = time.monotonic()
+    restore_replicas(dc_obj)
+    check_succesful_deployment(name, route_host, auth_user, auth_password)
+
+    cold_start = time.monotonic() - start
+    dc_obj.annotate({COLD_START_ANNOTATION: f"{cold_start:.1f}"}, refresh_model=False)
+    logger.info(f"Cold start of {name} took {cold_start:.1f} seconds")
+    return cold_start
+
+
+def is_model_group(dc_obj):
+    """Checks if the deployment serves several models (see `create_model_group`).
+
+    Args:
+        dc_obj (openshift.apiobject.APIObject): deployment config
+
+    Returns:
+        bool: True for multi-model deployments
+    """
+    return dc_obj.get_label(MULTI_MODEL_LABEL) == "true"
+
+
+def get_group_models(name):
+    """Retrieves the models served by a model group.
+
+    Args:
+        name (str): name of the model group
+
+    Raises:
+        MlflowException: no model group with that name found
+
+    Returns:
+        dict: model name -> model uri
+    """
+    cm_obj = oc.selector(f"configmap/{name}-models").object(ignore_not_found=True)
+    if cm_obj is None:
+        raise MlflowException(f"No model group with name: {name} found")
+    return json.loads(cm_obj.model.data[MODELS_FILE])
+
+
+def set_group_models(name, models):
+    """Creates or updates the config map listing the models of a model group.
+    The running server picks up the change without a restart.
+
+    Args:
+        name (str): name of the model group
+        models (dict): model name -> model uri
+
+    Returns:
+        list: changes that were applied, see `apply_object_diff`
+    """
+    desired = {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {"name": f"{name}-models", "labels": {"app": name}},
+        "data": {MODELS_FILE: json.dumps(models, sort_keys=True)}
+    }
+    live_obj = oc.selector(f"configmap/{name}-models").object(ignore_not_found=True)
+    return apply_object_diff(live_obj, desired)
+
+
+def get_shadow(name, dc_obj=None):
+    """Retrieves the shadow settings of a deployment (see `create_shadow`).
+
+    Args:
+        name (str): name of the live deployment
+        dc_obj (openshift.apiobject.APIObject, optional): deployment config, if
+            already retrieved. Defaults to None
+
+    Returns:
+        dict: shadow settings, None if the deployment has no shadow candidate
+    """
+    if dc_obj is None:
+        dc_obj = oc.selector("dc", labels={"app": name}).object(ignore_not_found=True)
+    if dc_obj is None or not dc_obj.get_annotation(SHADOW_ANNOTATION):
+        return None
+    return json.loads(dc_obj.get_annotation(SHADOW_ANNOTATION))
+
+
+def get_shadow_parameters(name):
+    """Retrieves the template parameters that keep mirroring requests to the shadow
+    candidate, when the live deployment is re-applied from its template.
+
+    Args:
+        name (str): name of the live deployment
+
+    Returns:
+        dict: SHADOW_* template parameters, empty without shadow candidate
+    """
+    shadow = get_shadow(name)
+    if shadow is None:
+        return {}
+    return {
+        "SHADOW_HOST": shadow["host"],
+        "SHADOW_ENABLED": "1",
+        "SHADOW_PERCENT": shadow["percent"]
+    }
+
+
+def set_shadow_env(dc_dict, host=None, percent=None):
+    """Sets the mirroring of requests in the auth proxy of a deployment config.
+
+    Args:
+        dc_dict (dict): containing the deployment config of the live deployment
+        host (str, optional): service host and port of the shadow candidate.
+            Defaults to None, which stops mirroring and points the host back to
+            the serving container, as nginx has to resolve it on start up
+        percent (str, optional): share of the requests that are mirrored in percent
+
+    Returns:
+        dict: containing the changed deployment config
+    """
+    if host is None:
+        values = {"SHADOW_HOST": SHADOW_DISABLED_HOST, "SHADOW_ENABLED": "0"}
+    else:
+        values = {"SHADOW_HOST": host, "SHADOW_ENABLED": "1", "SHADOW_PERCENT": percent}
+    for env_var in get_container(dc_dict, AUTH_PROXY_CONTAINER).get("env", []):
+        if env_var["name"] in values:
+            env_var["value"] = values[env_var["name"]]
+    return dc_dict
+
+
+def create_shadow_objects(name, candidate, dc_dict):
+    """Creates the service, route and deployment config of a shadow candidate as
+    copies of the live deployment.
+
+    Args:
+        name (str): name of the live deployment
+        candidate (str): name of the shadow candidate
+        dc_dict (dict): deployment config of the live deployment, already changed
+            to the candidate model or image
+    """
+    objs = [
+        copy_object(obj.as_dict(), name, candidate)
+        for obj in oc.selector(["service", "route"], labels={"app": name}).objects()
+    ]
+    candidate_dc = copy_object(dc_dict, name, candidate)
+    candidate_dc["spec"]["replicas"] = 1
+    candidate_dc["metadata"]["annotations"][IDLE_TIMEOUT_ANNOTATION] = "0"
+    objs.append(candidate_dc)
+
+    for obj in objs:
+        obj["metadata"]["labels"][SHADOW_OF_LABEL] = name
+    oc.create(objs)
+    logger.info(f"Created shadow candidate {candidate} of {name}")
+
+
+def wait_for_rollout(name):
+    """Waits until the latest rollout of the deployment config has replaced all pods.
+
+    Args:
+        name (str): name of the openshift application
+
+    Raises:
+        MlflowException: the rollout failed
+    """
+    try:
+        oc.invoke("rollout", ["status", f"dc/{name}", "--watch"])
+    except OpenShiftPythonException as error:
+        raise MlflowException(f"rollout of {name} failed: {error}")
+
+
+def delete_shadow_resources(name):
+    """Deletes all resources of the shadow candidate of a deployment.
+
+    Args:
+        name (str): name of the live deployment
+    """
+    oc.selector(labels={SHADOW_OF_LABEL: name}).delete()
+
+
+def get_proxy_timings(name, since):
+    """Collects the model requests logged by the auth proxies of all pods of
+    a deployment.
+
+    Notes:
+        Requests of pods that were deleted or restarted are lost.
+
+    Args:
+        name (str): name of the openshift application
+        since (float): unix timestamp, earlier requests are skipped
+
+    Returns:
+        list: (status code, seconds) of every `/invocations` request
+    """
+    records = []
+    # only fetch the log lines written since then, plus some slack for clock skew
+    log_since = f"{int(time.time() - since) + 60}s"
+    for pod_obj in oc.selector("pods", labels={"app": name}).objects():
+        if pod_obj.model.status.phase != "Running":
+            continue
+        for container_name, log in pod_obj.logs(since=log_since).items():
+            if AUTH_PROXY_CONTAINER in container_name:
+                records += parse_timing_logs(log, since)
+    return records
 
 
 def get_raw_pod_info(name):
@@ -61,41 +503,62 @@ def get_raw_pod_info(name):
     return pod_info
 
 
-def update_container_image(dc_obj, config):
-    """Patches deployment config of an already existing mlflow deployment
-    with a new configuration, i.e. docker image, tag.
+def is_rollout_triggered(changes):
+    """Checks if the applied changes lead to a new rollout of the model pod.
+
+    Notes:
+        Only changes of the pod template trigger a rollout, metadata like the idle
+        annotations or the replicas are changed in place.
 
     Args:
-        dc_obj (openshift.apiobject.APIOoject): containing the deployment config
-            of the already deployed mlflow model pod.
-        model_uri (str): path where to find the mlflow packed model
+        changes (list): changes as returned by `apply_object_diff`
+
+    Returns:
+        bool: True if the deployment config was created or its pod template changed
+    """
+    return any(
+        change["resource"].startswith("deploymentconfig") and
+        (change["field"] is None or change["field"].startswith("spec.template"))
+        for change in changes
+    )
 
 
+def update_container_image(dc_dict, config):
+    """Sets a new container image, i.e. docker image, tag, in the deployment config
+    of an already existing mlflow deployment.
+
+    Args:
+        dc_dict (dict): containing the deployment config
+            of the already deployed mlflow model pod.
+        config (dict): config items `docker_registry`, `image` and `tag`
+
     Returns:
-        openshift.apiobject.APIOoject: containing the patched deployment config
+        dict: containing the changed deployment config
     """
     new_image = config["docker_registry"] + "/" + config["image"] + ":" + config["tag"]
-    dc_obj.model.spec.template.spec.containers[1].image = new_image
-    return dc_obj
+    get_container(dc_dict, MODEL_SERVING_CONTAINER)["image"] = new_image
+    return dc_dict
 
 
-def update_model_uri(dc_obj, model_uri):
-    """Patches deployment config of an already existing mlflow deployment
-    with a new model-uri.
+def update_model_uri(dc_dict, model_uri):
+    """Sets a new model-uri in the deployment config of an already existing
+    mlflow deployment.
 
     Args:
-        dc_obj (openshift.apiobject.APIOoject): containing the deployment config
+        dc_dict (dict): containing the deployment config
             of the already deployed mlflow model pod.
         model_uri (str): path where to find the mlflow packed model
 
-
     Returns:
-        openshift.apiobject.APIOoject: containing the patched deployment config
+        dict: containing the changed deployment config
     """
-    command = dc_obj.model.spec.template.spec.containers[1].command
-    command[4] = model_uri
-    dc_obj.model.spec.template.spec.containers[1].command = command
-    return dc_obj
+    container = get_container(dc_dict, MODEL_SERVING_CONTAINER)
+    command = container["command"]
+    command[command.index("-m") + 1] = model_uri
+    for env_var in container.get("env", []):
+        if env_var["name"] == "MODEL_URI":
+            env_var["value"] = model_uri
+    return dc_dict
 
 
 def delete_all_resources(name, project):
@@ -106,6 +569,10 @@ def delete_all_resources(name, project):
         project (str): openshift project name
     """
     oc.selector(labels={"app": name}).delete()
+    # configmaps are not part of `all`, e.g. the model list of a model group
+    oc.selector("configmaps", labels={"app": name}).delete()
+    oc.selector("daemonsets", labels={"mlflow-pre-pull": name}).delete()
+    delete_shadow_resources(name)
 
 
 def check_succesful_deployment(name, route_host, auth_user, auth_password):
@@ -135,13 +602,13 @@ def check_succesful_deployment(name, route_host, auth_user, auth_password):
             container_statuses = pod_obj.model.status.containerStatuses
 
             for container_status in container_statuses:
-                if container_status.name == "model-serving":
+                if container_status.name == MODEL_SERVING_CONTAINER:
                     container_state = container_status.state.keys()
                     if (TERMINATED_STATUS in container_state):
                         error_log = ""
                         pod_logs = pod_obj.logs()
                         for pod_name, pod_log in pod_logs.items():
-                            if "model-serving" in pod_name:
+                            if MODEL_SERVING_CONTAINER in pod_name:
                                 error_log += pod_log
                         raise MlflowException(
                             f"The pod terminated, see the following logs: \n {error_log}"
@@ -150,7 +617,7 @@ def check_succesful_deployment(name, route_host, auth_user, auth_password):
                     elif RUNNING_STATUS in container_state:
                         status_code = requests.get(
                             f"https://{route_host}",
-                            auth=(auth_user, auth_password)
+                            auth=(auth_user, auth_password) if auth_user else None
                         ).status_code
                         if status_code == 404:
                             # 404 is returned by the server of you call "/" endpoint
@@ -170,6 +637,274 @@ def check_succesful_deployment(name, route_host, auth_user, auth_password):
             time.sleep(1)
 
 
+# executed inside the model serving container, so every replica is reached directly
+# and not only the one the router picks. Sends *workers* concurrent requests per
+# round to make sure every gunicorn worker receives some of them.
+WARM_UP_SCRIPT = """
+import json, sys, time, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+data = sys.stdin.read().encode()
+workers, rounds = int(sys.argv[1]), int(sys.argv[2])
+
+def send(_):
+    start = time.time()
+    request = urllib.request.Request(
+        "http://localhost:8080/invocations", data=data,
+        headers={"Content-Type": "application/json"})
+    urllib.request.urlopen(request).read()
+    return time.time() - start
+
+with ThreadPoolExecutor(workers) as pool:
+    print(json.dumps(list(pool.map(send, range(workers * rounds)))))
+"""
+
+
+def warm_up_deployment(name, payload):
+    """Sends synthetic requests to every gunicorn worker on every replica of the
+    latest rollout, so lazily initialised model internals are loaded before real
+    requests arrive.
+
+    Args:
+        name (str): name of the openshift application
+        payload (str): request body as expected by the `/invocations` endpoint
+
+    Raises:
+        MlflowException: a warm-up request failed
+
+    Returns:
+        dict: warm-up duration and request latencies in seconds per pod, e.g.
+            {'seconds': 3.2, 'pods': {<pod-name>: {'first': 2.9, 'max': 2.9, 'last': 0.1}}}
+    """
+    dc_obj = get_deployment_config(name)
+    command = get_container(dc_obj.as_dict(), MODEL_SERVING_CONTAINER)["command"]
+    workers = command[command.index("--workers") + 1]
+    latest_deployment = f"{name}-{dc_obj.model.status.latestVersion}"
+
+    start = time.monotonic()
+    pods = {}
+    for pod_obj in oc.selector(
+            "pods", labels={"app": name, "deployment": latest_deployment}).objects():
+        try:
+            result = pod_obj.execute(
+                ["python", "-c", WARM_UP_SCRIPT, workers, str(WARM_UP_ROUNDS)],
+                stdin=payload, container_name=MODEL_SERVING_CONTAINER
+            )
+        except OpenShiftPythonException as oc_exception:
+            raise MlflowException(f"Warm-up of {pod_obj.name()} failed: {oc_exception}")
+        latencies = json.loads(result.out())
+        pods[pod_obj.name()] = {
+            "first": latencies[0], "max": max(latencies), "last": latencies[-1]
+        }
+
+    warm_up = {"seconds": time.monotonic() - start, "pods": pods}
+    logger.info(f"Warm-up of {name} took {warm_up['seconds']:.1f} seconds")
+    return warm_up
+
+
+def create_batch_partitions(config, template, partitions):
+    """Creates one openshift job per partition of a batch scoring run.
+
+    Args:
+        config (dict): template parameters, e.g. {"NAME": <some-name>}
+        template (str): filepath to openshift batch scoring job template yaml.
+        partitions (list): indices of the partitions to create jobs for
+    """
+    for partition in partitions:
+        job_objs = render_template(dict(config, PARTITION=str(partition)), template)
+        oc.create(job_objs)
+
+
+def get_batch_partitions(name):
+    """Retrieves the status of all partitions of a batch scoring run.
+
+    Args:
+        name (str): name of the batch scoring run
+
+    Raises:
+        MlflowException: no batch scoring run with that name found
+
+    Returns:
+        dict: status per partition index, one of `succeeded`, `failed`, `running`
+    """
+    job_objs = oc.selector("jobs", labels={"app": name, "template": "mlflow-batch"}).objects()
+    if not job_objs:
+        raise MlflowException(f"No batch scoring job with name: {name} found")
+
+    partitions = {}
+    for job_obj in job_objs:
+        status = job_obj.model.status
+        conditions = {c.type: c.status for c in (status.conditions or [])}
+        if status.succeeded:
+            state = BATCH_SUCCEEDED_STATUS
+        elif conditions.get("Failed") == "True":
+            state = BATCH_FAILED_STATUS
+        else:
+            state = BATCH_RUNNING_STATUS
+        partitions[int(job_obj.get_label("partition"))] = state
+    return partitions
+
+
+def retry_batch_partitions(name, partitions):
+    """Recreates the jobs of the given partitions with their original definition.
+    The new job gets a generated name, so the old job is only deleted once the
+    new one was created.
+
+    Args:
+        name (str): name of the batch scoring run
+        partitions (list): indices of the partitions
+    """
+    for partition in partitions:
+        job_obj = oc.selector(
+            "jobs", labels={"app": name, "partition": str(partition)}).object()
+        job = job_obj.as_dict()
+        job.pop("status", None)
+        job["metadata"] = {
+            "generateName": f"{name}-{partition}-",
+            "labels": job["metadata"]["labels"]
+        }
+        # generated by openshift for the old job, new ones are set on submit
+        job["spec"].pop("selector", None)
+        for label in ("controller-uid", "job-name",
+                      "batch.kubernetes.io/controller-uid", "batch.kubernetes.io/job-name"):
+            job["spec"]["template"]["metadata"]["labels"].pop(label, None)
+
+        oc.create(job)
+        oc.selector("pods", labels={"job-name": job_obj.name()}).delete()
+        job_obj.delete()
+
+
+def get_nodes_without_image(image):
+    """Retrieves the schedulable nodes and the ones that already have the image.
+
+    Args:
+        image (str): full image reference, i.e. <registry>/<image>:<tag>
+
+    Returns:
+        tuple: names of the nodes without and with the image, (None, None) if the
+            nodes can't be read, e.g. missing permissions
+    """
+    try:
+        node_objs = oc.selector("nodes").objects()
+    except OpenShiftPythonException:
+        return None, None
+
+    without_image, with_image = [], []
+    for node_obj in node_objs:
+        if node_obj.model.spec.unschedulable:
+            continue
+        node_images = [name for image_obj in node_obj.model.status.images or []
+                       for name in image_obj.names]
+        (with_image if image in node_images else without_image).append(node_obj.name())
+    return without_image, with_image
+
+
+def get_deployed_image(name):
+    """Retrieves the image of the model serving container of a deployment.
+
+    Args:
+        name (str): name of the openshift application
+
+    Returns:
+        str: full image reference, None if the deployment does not exist
+    """
+    dc_obj = oc.selector(f"dc/{name}").object(ignore_not_found=True)
+    if dc_obj is None:
+        return None
+    return get_container(dc_obj.as_dict(), MODEL_SERVING_CONTAINER)["image"]
+
+
+def start_pre_pull(name, config, template):
+    """Starts pulling the image onto all schedulable nodes, that don't have it
+    yet, with a short-lived daemon set. Returns immediately.
+
+    Args:
+        name (str): name of the openshift application
+        config (dict): template parameters, DOCKER_REGISTRY, IMAGE and TAGVERSION
+        template (str): filepath to openshift pre-pull template yaml.
+
+    Returns:
+        dict: state of the pre-pull for `wait_for_pre_pull`
+    """
+    image = f"{config['DOCKER_REGISTRY']}/{config['IMAGE']}:{config['TAGVERSION']}"
+    without_image, with_image = get_nodes_without_image(image)
+    pre_pull = {"name": name, "start": time.monotonic(), "skipped": with_image or []}
+    if without_image == []:
+        logger.info(f"Image {image} is already present on all nodes")
+        return pre_pull
+
+    oc.selector("daemonsets", labels={"mlflow-pre-pull": name}).delete()
+    daemon_set = render_template(dict(config, NAME=name), template)[0].as_dict()
+    if with_image:
+        daemon_set["spec"]["template"]["spec"]["affinity"] = {"nodeAffinity": {
+            "requiredDuringSchedulingIgnoredDuringExecution": {"nodeSelectorTerms": [{
+                "matchExpressions": [{
+                    "key": "kubernetes.io/hostname", "operator": "NotIn", "values": with_image
+                }]
+            }]}
+        }}
+    oc.create(daemon_set)
+    pre_pull["started"] = True
+    return pre_pull
+
+
+def wait_for_pre_pull(pre_pull):
+    """Waits until the pre-pull daemon set runs on all its nodes and removes it.
+    Slow pulls are only logged, the rollout pulls the image itself in that case.
+
+    Args:
+        pre_pull (dict): state of the pre-pull returned by `start_pre_pull`
+
+    Raises:
+        MlflowException: Image pulling error
+
+    Returns:
+        dict: {'seconds': <total>, 'nodes': {<node>: <pull seconds>}, 'skipped': [<node>]}
+    """
+    report = {"seconds": 0.0, "nodes": {}, "skipped": pre_pull["skipped"]}
+    if not pre_pull.get("started"):
+        return report
+
+    selector = oc.selector("pods", labels={"mlflow-pre-pull": pre_pull["name"]})
+    try:
+        while time.monotonic() - pre_pull["start"] < PRE_PULL_TIMEOUT:
+            ds_obj = oc.selector(
+                "daemonsets", labels={"mlflow-pre-pull": pre_pull["name"]}).object()
+            pod_objs = selector.objects()
+            for pod_obj in pod_objs:
+                for container_status in pod_obj.model.status.containerStatuses or []:
+                    waiting = container_status.state[WAITING_STATUS]
+                    if waiting and waiting.reason in ("ErrImagePull", "ImagePullBackOff"):
+                        raise MlflowException(f"Image cannot be found: {waiting.message}")
+            status = ds_obj.model.status
+            # zero counts are omitted, they only count once the controller saw the daemon set
+            if status.observedGeneration and \
+                    status.observedGeneration >= ds_obj.model.metadata.generation and \
+                    (status.numberReady or 0) == (status.desiredNumberScheduled or 0):
+                break
+            time.sleep(PRE_PULL_SLEEP_TIME)
+        else:
+            logger.warning(f"Pre-pull of the image not finished after {PRE_PULL_TIMEOUT} seconds")
+
+        for pod_obj in selector.objects():
+            for container_status in pod_obj.model.status.containerStatuses or []:
+                running = container_status.state[RUNNING_STATUS]
+                if running:
+                    report["nodes"][pod_obj.model.spec.nodeName] = _seconds_between(
+                        pod_obj.model.metadata.creationTimestamp, running.startedAt)
+    finally:
+        oc.selector("daemonsets", labels={"mlflow-pre-pull": pre_pull["name"]}).delete()
+
+    report["seconds"] = time.monotonic() - pre_pull["start"]
+    logger.info(f"Pre-pull of the image took {report['seconds']:.1f} seconds")
+    return report
+
+
+def _seconds_between(start, end):
+    start_ts = calendar.timegm(time.strptime(start, "%Y-%m-%dT%H:%M:%SZ"))
+    return calendar.timegm(time.strptime(end, "%Y-%m-%dT%H:%M:%SZ")) - start_ts
+
+
 def get_route_name(name):
     """Retrieves the route name of the openshift application.
 
@@ -189,28 +924,48 @@ def get_route_name(name):
         raise MlflowException(f"could not find route information for {name}")
 
 
-def get_authentication_info(name):
+def has_auth_proxy(dc_dict):
+    """Checks if the deployment terminates authentication in its auth proxy.
+
+    Args:
+        dc_dict (dict): containing the deployment config
+
+    Returns:
+        bool: True if the pod has an auth proxy container
+    """
+    containers = dc_dict["spec"]["template"]["spec"]["containers"]
+    return any(container["name"] == AUTH_PROXY_CONTAINER for container in containers)
+
+
+def get_authentication_info(name, dc_obj=None):
     """Retrieves the authentication information of the model's openshift
     application.
 
     Args:
         name (name): name of the openshift application
+        dc_obj (openshift.apiobject.APIObject, optional): deployment config, if
+            already retrieved. Defaults to None
 
     Returns:
-        tuple: authentication user, authentication password
+        tuple: authentication user, authentication password,
+            (None, None) for deployments without auth proxy
     """
-    pod_obj = get_pod_info_from_app_name(name)
+    if dc_obj is None:
+        dc_obj = get_deployment_config(name)
+    dc_dict = dc_obj.as_dict()
+    if not has_auth_proxy(dc_dict):
+        # authentication is terminated outside of the deployment
+        return None, None
+
     auth_user = ""
     auth_password = ""
-    for container_info in pod_obj.model.spec.containers:
-        if container_info.name == "auth-proxy":
-            for env_var in container_info.env:
-                if env_var.name == "BASIC_AUTH_USERNAME":
-                    auth_user = env_var.value
-                elif env_var.name == "BASIC_AUTH_PASSWORD":
-                    auth_password = env_var.value
-                else:
-                    continue
+    for env_var in get_container(dc_dict, AUTH_PROXY_CONTAINER).get("env", []):
+        if env_var["name"] == "BASIC_AUTH_USERNAME":
+            auth_user = env_var["value"]
+        elif env_var["name"] == "BASIC_AUTH_PASSWORD":
+            auth_password = env_var["value"]
+        else:
+            continue
     return auth_user, auth_password
 
 
@@ -230,11 +985,14 @@ def get_pod_info_from_app_name(name):
     newest_pod_start_time = datetime.datetime(2000, 1, 1, 1, 1, 1)
     retries_left = RETRIES
 
-    if retries_left > 0:
-        pod_objs = oc.selector("pods", labels={"app": name}).objects()
+    while retries_left > 0:
+        pod_objs = [
+            pod_obj for pod_obj in oc.selector("pods", labels={"app": name}).objects()
+            if pod_obj.model.status.startTime
+        ]
 
         if not pod_objs:
-            # no containers for that application, yet
+            # no (scheduled) containers for that application, yet
             retries_left -= 1
             time.sleep(SLEEP_TIME)
         else:
@@ -248,7 +1006,7 @@ def get_pod_info_from_app_name(name):
                     newest_pod_start_time = start_time_dt
                     newest_pod = pod_obj
             return newest_pod
-    else:
-        timeout = RETRIES*SLEEP_TIME
-        raise MlflowException(
-            f"Timeout: No new pod was started for {name} within {timeout} seconds")
+
+    timeout = RETRIES*SLEEP_TIME
+    raise MlflowException(
+        f"Timeout: No new pod was started for {name} within {timeout} seconds")
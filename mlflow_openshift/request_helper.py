@@ -0,0 +1,161 @@
+import collections
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import requests
+
+from mlflow.exceptions import MlflowException
+
+from mlflow_openshift.defaults import CONNECT_TIMEOUT, READ_TIMEOUT, REQUEST_RETRIES, \
+    BACKOFF_BASE, BACKOFF_CAP, RETRY_STATUS_CODES, RETRY_BUDGET_RATIO, RETRY_BUDGET_MAX, \
+    HEDGE_QUANTILE, HEDGE_MIN_SAMPLES, LATENCY_WINDOW
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPolicy:
+    """Timeouts, retries and hedging for requests against a model endpoint.
+
+    Failed requests (connection errors or a status code in `RETRY_STATUS_CODES`)
+    are retried with jittered exponential backoff, as long as the retry budget
+    allows it. The budget grows with every request, so retries can't multiply
+    the load on an endpoint that is down.
+
+    With `hedge` enabled, a duplicate request is sent if the first one did not
+    answer within the `hedge_quantile` of the latencies recently observed for
+    the same host. The response that arrives first is used.
+
+    Args:
+        connect_timeout (float, optional): seconds to establish a connection
+        read_timeout (float, optional): seconds to wait for the response
+        retries (int, optional): maximum retries per request
+        hedge (bool, optional): send hedged requests. Defaults to False
+        hedge_quantile (float, optional): latency quantile after which to hedge
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=REQUEST_RETRIES, hedge=False, hedge_quantile=HEDGE_QUANTILE):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+
+        # one window per host, deployments differ in their latencies
+        self._latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=LATENCY_WINDOW))
+        self._retry_budget = RETRY_BUDGET_MAX
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def post(self, url, **kwargs):
+        """Sends a POST request according to the policy.
+
+        Args:
+            url (str): url of the request
+            **kwargs: passed on to `requests.post`
+
+        Raises:
+            MlflowException: request failed after all retries or with a status
+                code that is not retried
+
+        Returns:
+            requests.Response: successful response
+        """
+        with self._lock:
+            self._retry_budget = min(self._retry_budget + RETRY_BUDGET_RATIO, RETRY_BUDGET_MAX)
+
+        attempt = 0
+        while True:
+            try:
+                response = self._send(url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    break
+                error = f"status code {response.status_code}"
+            except requests.exceptions.ConnectionError as connection_error:
+                # also covers connect timeouts and connection resets
+                response = None
+                error = str(connection_error)
+            except requests.exceptions.Timeout:
+                raise MlflowException(
+                    f"Request to {url} timed out after {self.timeout[1]} seconds")
+
+            if attempt >= self.retries or not self._withdraw_retry():
+                raise MlflowException(
+                    f"Request to {url} failed after {attempt + 1} attempts: {error}")
+
+            backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            logger.info(f"Request to {url} failed ({error}), retry in {backoff:.2f} seconds")
+            time.sleep(backoff)
+            attempt += 1
+
+        if not response.ok:
+            raise MlflowException(
+                f"Request to {url} failed with status code {response.status_code}: "
+                f"{response.text}"
+            )
+        return response
+
+    def hedge_delay(self, url):
+        """Returns the delay after which a hedged request is sent.
+
+        Args:
+            url (str): url of the request
+
+        Returns:
+            float: seconds, None if hedging is disabled or not enough latencies of
+                the host are known
+        """
+        with self._lock:
+            latencies = self._latencies.get(urlparse(url).netloc, ())
+            if not self.hedge or len(latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            return float(np.quantile(latencies, self.hedge_quantile))
+
+    def _withdraw_retry(self):
+        with self._lock:
+            if self._retry_budget < 1:
+                return False
+            self._retry_budget -= 1
+            return True
+
+    def _timed_post(self, url, **kwargs):
+        start = time.monotonic()
+        response = requests.post(url, timeout=self.timeout, **kwargs)
+        with self._lock:
+            self._latencies[urlparse(url).netloc].append(time.monotonic() - start)
+        return response
+
+    def _send(self, url, **kwargs):
+        delay = self.hedge_delay(url)
+        if delay is None:
+            return self._timed_post(url, **kwargs)
+
+        with self._lock:
+            # created on first use, `hedge` may be enabled after construction
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=4)
+        futures = {self._executor.submit(self._timed_post, url, **kwargs)}
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            logger.debug(f"No response from {url} after {delay:.3f} seconds, hedging")
+            futures.add(self._executor.submit(self._timed_post, url, **kwargs))
+
+        # the first successful response wins, a failure only counts if all failed
+        error = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as request_error:
+                    error = request_error
+                    continue
+                if response.status_code not in RETRY_STATUS_CODES or not futures:
+                    return response
+        raise error
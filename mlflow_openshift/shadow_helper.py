@@ -0,0 +1,218 @@
+import calendar
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from mlflow_openshift.defaults import CONNECT_TIMEOUT, READ_TIMEOUT, SHADOW_COMPARE_WORKERS
+
+
+logger = logging.getLogger(__name__)
+
+# written by the auth proxy for every request, see `log_format timing` in the templates
+TIMING_LOG_PREFIX = "mlflow-timing"
+SHADOWED_HEADER = "X-Mlflow-Shadowed"
+
+
+class ShadowComparison:
+    """Compares the predictions of a live deployment with its shadow candidate.
+
+    `submit` sends a request, that was already answered by the live deployment,
+    to the candidate in a background thread, so the caller does not wait for the
+    candidate. The predictions of both are compared row by row.
+
+    Args:
+        workers (int, optional): concurrent requests to the candidate
+    """
+
+    def __init__(self, workers=SHADOW_COMPARE_WORKERS):
+        self.rows = 0
+        self.mismatched_rows = 0
+        self.errors = 0
+        self._abs_diff_sum = 0.0
+        self._abs_diff_count = 0
+        self._max_abs_diff = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def submit(self, url, auth, data, live_predictions):
+        """Sends the request to the candidate and compares its predictions in the
+        background.
+
+        Args:
+            url (str): invocations url of the candidate
+            auth (tuple): basic auth credentials, None without auth proxy
+            data (str): json payload already sent to the live deployment
+            live_predictions (np.ndarray): predictions of the live deployment
+        """
+        self._executor.submit(self._compare, url, auth, data, live_predictions)
+
+    def _compare(self, url, auth, data, live_predictions):
+        try:
+            response = requests.post(
+                url,
+                headers={'Content-Type': 'application/json', SHADOWED_HEADER: "client"},
+                auth=auth,
+                data=data,
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+            )
+            response.raise_for_status()
+            candidate_predictions = np.array(json.loads(response.content.decode("utf-8")))
+        except (requests.exceptions.RequestException, ValueError) as error:
+            logger.info(f"Shadow request to {url} failed: {error}")
+            with self._lock:
+                self.errors += 1
+            return
+        self.add(live_predictions, candidate_predictions)
+
+    def add(self, live_predictions, candidate_predictions):
+        """Adds the predictions of both deployments for the same rows.
+
+        Args:
+            live_predictions (np.ndarray): predictions of the live deployment
+            candidate_predictions (np.ndarray): predictions of the candidate
+        """
+        live = np.atleast_1d(live_predictions)
+        candidate = np.atleast_1d(candidate_predictions)
+        rows = len(live)
+        if not rows:
+            return
+
+        with self._lock:
+            self.rows += rows
+            if live.shape != candidate.shape:
+                self.mismatched_rows += rows
+                return
+
+            live = live.reshape(rows, -1)
+            candidate = candidate.reshape(rows, -1)
+            if np.issubdtype(live.dtype, np.number) and \
+                    np.issubdtype(candidate.dtype, np.number):
+                abs_diff = np.abs(live.astype(float) - candidate.astype(float))
+                self._abs_diff_sum += float(abs_diff.sum())
+                self._abs_diff_count += abs_diff.size
+                self._max_abs_diff = max(self._max_abs_diff, float(abs_diff.max()))
+                mismatched = ~np.isclose(live, candidate).all(axis=1)
+            else:
+                mismatched = (live != candidate).any(axis=1)
+            self.mismatched_rows += int(mismatched.sum())
+
+    def summary(self):
+        """Summarizes the compared predictions.
+
+        Returns:
+            dict: {'rows': <compared rows>, 'errors': <failed candidate requests>,
+                'mismatch_rate': <share of rows with different predictions>,
+                'mean_abs_diff': <mean absolute difference of numeric predictions>,
+                'max_abs_diff': <maximum absolute difference of numeric predictions>}
+        """
+        with self._lock:
+            return {
+                'rows': self.rows,
+                'errors': self.errors,
+                'mismatch_rate': self.mismatched_rows / self.rows if self.rows else None,
+                'mean_abs_diff': self._abs_diff_sum / self._abs_diff_count
+                if self._abs_diff_count else None,
+                'max_abs_diff': self._max_abs_diff if self._abs_diff_count else None
+            }
+
+
+def parse_timing_logs(log, since):
+    """Extracts the model requests from the timing log lines of an auth proxy.
+
+    Args:
+        log (str): container log of the auth proxy
+        since (int): unix timestamp, earlier requests are skipped
+
+    Returns:
+        list: (status code, seconds) of every `/invocations` request, seconds are
+            None if the model serving container did not answer
+    """
+    records = []
+    for line in log.splitlines():
+        fields = line.split()
+        if len(fields) != 5 or fields[0] != TIMING_LOG_PREFIX or fields[4] != "/invocations":
+            continue
+        try:
+            timestamp = _parse_iso_time(fields[1])
+            record = (int(fields[2]), None if fields[3] == "-" else float(fields[3]))
+        except ValueError:
+            continue
+        if timestamp >= since:
+            records.append(record)
+    return records
+
+
+def _parse_iso_time(value):
+    # nginx $time_iso8601, e.g. 2020-01-01T12:00:00+01:00
+    timestamp = calendar.timegm(time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S"))
+    offset = value[19:]
+    if offset in ("", "Z"):
+        return timestamp
+    hours, minutes = offset[1:].split(":")
+    sign = -1 if offset[0] == "-" else 1
+    return timestamp - sign * (int(hours) * 3600 + int(minutes) * 60)
+
+
+def summarize_requests(records):
+    """Computes latency percentiles and the error rate of model requests.
+
+    Args:
+        records (list): (status code, seconds) as returned by `parse_timing_logs`
+
+    Returns:
+        dict: {'requests': <count>, 'error_rate': <share of 5xx responses>,
+            'p50': <ms>, 'p95': <ms>, 'p99': <ms>}, latencies of the model serving
+            container, percentiles are None without answered requests
+    """
+    latencies = np.array([seconds for _, seconds in records if seconds is not None]) * 1000
+    errors = sum(1 for status, _ in records if status >= 500)
+    summary = {
+        'requests': len(records),
+        'error_rate': errors / len(records) if records else None
+    }
+    for quantile in (50, 95, 99):
+        summary[f'p{quantile}'] = \
+            float(np.percentile(latencies, quantile)) if len(latencies) else None
+    return summary
+
+
+def decide_promotion(live, candidate, predictions, shadow):
+    """Decides if the candidate can replace the live deployment.
+
+    Args:
+        live (dict): request summary of the live deployment, see `summarize_requests`
+        candidate (dict): request summary of the candidate
+        predictions (dict): prediction comparison, see `ShadowComparison.summary`
+        shadow (dict): shadow settings with the promotion thresholds
+
+    Returns:
+        tuple: True if the candidate can be promoted, list of reasons against it
+    """
+    if candidate['requests'] < shadow['min_requests'] or not live['requests']:
+        return False, [
+            f"not enough traffic: {candidate['requests']} candidate requests, "
+            f"{shadow['min_requests']} needed"
+        ]
+
+    reasons = []
+    if candidate['p95'] is None:
+        reasons.append("the candidate did not answer any request")
+    elif live['p95'] is not None and \
+            candidate['p95'] > live['p95'] * (1 + shadow['latency_tolerance']):
+        reasons.append(
+            f"p95 latency {candidate['p95']:.1f} ms exceeds {live['p95']:.1f} ms "
+            f"by more than {shadow['latency_tolerance']:.0%}")
+    if candidate['error_rate'] > live['error_rate'] + shadow['error_tolerance']:
+        reasons.append(
+            f"error rate {candidate['error_rate']:.2%} exceeds {live['error_rate']:.2%} "
+            f"by more than {shadow['error_tolerance']:.2%}")
+    if predictions['rows'] and predictions['mismatch_rate'] > shadow['max_mismatch_rate']:
+        reasons.append(
+            f"{predictions['mismatch_rate']:.2%} of the compared rows have different "
+            f"predictions, at most {shadow['max_mismatch_rate']:.2%} allowed")
+    return not reasons, reasons
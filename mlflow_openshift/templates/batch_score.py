@@ -0,0 +1,54 @@
+# Scores one partition of the files under INPUT_URI and writes the predictions
+# with the same file names to OUTPUT_URI. Files are assigned to the partitions
+# round-robin in sorted order, so every partition can be (re-)run on its own.
+import io
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+import boto3
+import numpy as np
+import pandas as pd
+import mlflow.pyfunc
+
+partition, partitions = int(os.environ["PARTITION"]), int(os.environ["PARTITIONS"])
+source, target = urlparse(os.environ["INPUT_URI"]), urlparse(os.environ["OUTPUT_URI"])
+s3 = boto3.client("s3", endpoint_url=os.environ["MLFLOW_S3_ENDPOINT_URL"])
+
+keys = []
+for page in s3.get_paginator("list_objects_v2").paginate(
+        Bucket=source.netloc, Prefix=source.path.lstrip("/")):
+    keys += [obj["Key"] for obj in page.get("Contents", []) if not obj["Key"].endswith("/")]
+keys = sorted(keys)[partition::partitions]
+
+model = mlflow.pyfunc.load_model(os.environ["MODEL_URI"])
+print(f"partition {partition}/{partitions}: {len(keys)} files", flush=True)
+
+for number, key in enumerate(keys, 1):
+    start = time.time()
+    body = io.BytesIO(s3.get_object(Bucket=source.netloc, Key=key)["Body"].read())
+    df = pd.read_parquet(body) if key.endswith(".parquet") else pd.read_csv(body)
+
+    predictions = model.predict(df)
+    if isinstance(predictions, pd.DataFrame):
+        result = predictions
+    else:
+        predictions = np.asarray(predictions)
+        if predictions.ndim == 1:
+            result = pd.DataFrame({"prediction": predictions}, index=df.index)
+        else:
+            predictions = predictions.reshape(len(df), -1)
+            result = pd.DataFrame(predictions, index=df.index, columns=[
+                f"prediction_{column}" for column in range(predictions.shape[1])])
+    out = io.BytesIO()
+    if key.endswith(".parquet"):
+        result.to_parquet(out)
+    else:
+        result.to_csv(out, index=False)
+
+    out_key = os.path.join(target.path.lstrip("/"), key[len(source.path.lstrip("/")):].lstrip("/"))
+    s3.put_object(Bucket=target.netloc, Key=out_key, Body=out.getvalue())
+    print(f"{number}/{len(keys)} {key}: {len(df)} rows in {time.time() - start:.1f}s", flush=True)
+
+sys.exit(0)
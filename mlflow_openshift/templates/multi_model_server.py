@@ -0,0 +1,139 @@
+# WSGI app serving several mlflow models from one process, run by gunicorn.
+# Requests are routed by path (/models/<name>/invocations) or by the header
+# X-Model-Name (/invocations). The models are read from MODELS_FILE, which is
+# re-read when it changes, loaded on first use and evicted least recently used
+# when their memory exceeds MODEL_MEMORY_BUDGET (MiB).
+import collections
+import gc
+import io
+import json
+import os
+import threading
+import time
+
+import mlflow.pyfunc
+from mlflow.pyfunc.scoring_server import parse_json_input, predictions_to_json
+from mlflow.tracking.artifact_utils import _download_artifact_from_uri
+
+MODELS_FILE = os.environ["MODELS_FILE"]
+MEMORY_BUDGET = int(os.environ["MODEL_MEMORY_BUDGET"]) * 2 ** 20
+
+
+def _rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _disk_size(path):
+    return sum(os.path.getsize(os.path.join(root, file))
+               for root, _, files in os.walk(path) for file in files)
+
+
+class ModelCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._registry = {}
+        self._registry_mtime = None
+        # name -> (model_uri, model, memory in bytes), least recently used first
+        self._models = collections.OrderedDict()
+        # one model is loaded at a time, so the rss difference belongs to it
+        self._load_lock = threading.Lock()
+
+    def _refresh_registry(self):
+        mtime = os.stat(MODELS_FILE).st_mtime
+        if mtime != self._registry_mtime:
+            with open(MODELS_FILE) as f:
+                self._registry = json.load(f)
+            self._registry_mtime = mtime
+            for name in list(self._models):
+                if self._models[name][0] != self._registry.get(name):
+                    del self._models[name]
+            gc.collect()
+
+    def _cached(self, name):
+        if name not in self._registry:
+            raise KeyError(name)
+        if name in self._models:
+            self._models.move_to_end(name)
+            return self._models[name][1]
+        return None
+
+    def get(self, name):
+        with self._lock:
+            self._refresh_registry()
+            model = self._cached(name)
+        if model is not None:
+            return model
+
+        # requests for loaded models are served while this one is loaded
+        with self._load_lock:
+            with self._lock:
+                model = self._cached(name)
+                model_uri = self._registry[name]
+            if model is not None:
+                return model
+
+            start = time.time()
+            local_path = _download_artifact_from_uri(model_uri)
+            rss = _rss()
+            model = mlflow.pyfunc.load_model(local_path)
+            # memory freed by other threads hides part of the rss difference, a
+            # loaded model takes at least the size of its artifacts
+            memory = max(_rss() - rss, _disk_size(local_path), 2 ** 20)
+            print(f"loaded {name} in {time.time() - start:.1f}s, {memory / 2 ** 20:.0f} MiB",
+                  flush=True)
+
+            with self._lock:
+                self._models[name] = (model_uri, model, memory)
+                while len(self._models) > 1 and \
+                        sum(entry[2] for entry in self._models.values()) > MEMORY_BUDGET:
+                    evicted, _ = self._models.popitem(last=False)
+                    print(f"evicted {evicted}", flush=True)
+            gc.collect()
+            return model
+
+    def status(self):
+        with self._lock:
+            self._refresh_registry()
+            return {
+                "models": self._registry,
+                "loaded": {name: entry[2] for name, entry in self._models.items()}
+            }
+
+
+cache = ModelCache()
+
+
+def _respond(start_response, status, body):
+    start_response(status, [("Content-Type", "application/json")])
+    return [body.encode("utf-8")]
+
+
+def app(environ, start_response):
+    path = environ["PATH_INFO"].strip("/").split("/")
+    if len(path) == 3 and path[0] == "models" and path[2] == "invocations":
+        name = path[1]
+    elif path == ["invocations"]:
+        name = environ.get("HTTP_X_MODEL_NAME")
+    elif path == ["models"]:
+        return _respond(start_response, "200 OK", json.dumps(cache.status()))
+    else:
+        # like `mlflow models serve`, which is used to check readiness
+        return _respond(start_response, "404 Not Found", "")
+
+    try:
+        model = cache.get(name)
+    except KeyError:
+        return _respond(start_response, "404 Not Found",
+                        json.dumps({"message": f"model {name} not found"}))
+
+    body = environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+    try:
+        df = parse_json_input(body.decode("utf-8"), orient="split")
+    except Exception as error:
+        return _respond(start_response, "400 Bad Request", json.dumps({"message": str(error)}))
+
+    output = io.StringIO()
+    predictions_to_json(model.predict(df), output)
+    return _respond(start_response, "200 OK", output.getvalue())
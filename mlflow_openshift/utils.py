@@ -1,11 +1,27 @@
 import os
+import re
+import json
+import math
 import logging
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
 
 from mlflow.exceptions import MlflowException
+from mlflow.models import Model
+from mlflow.models.utils import _read_example
+from mlflow.tracking.artifact_utils import _download_artifact_from_uri
+from mlflow.utils.uri import append_to_uri_path
 
 from mlflow_openshift.defaults import GUNICORN_WORKERS, \
     CPU_REQUEST, CPU_LIMIT, \
-    MEM_REQUEST, MEM_LIMIT
+    MEM_REQUEST, MEM_LIMIT, \
+    IDLE_TIMEOUT, MIN_WARM_TIME, WARM_UP_CONFIG_KEYS, \
+    GUNICORN_THREADS, MODEL_MEMORY_SHARE, \
+    PROXY_CPU_SHARE, PROXY_MIN_CPU_LIMIT, PROXY_MIN_CPU_REQUEST, \
+    PROXY_MEM_REQUEST, PROXY_MEM_LIMIT, PROXY_WORKER_CONNECTIONS, \
+    PROXY_UPSTREAM_KEEPALIVE, PROXY_BUFFERING, \
+    MODEL_SERVING_CONTAINER
 
 
 logger = logging.getLogger(__name__)
@@ -39,10 +55,10 @@ def set_config_defaults(config):
         raise MlflowException(f"Required environment variables {env} is not set.")
 
     # rename for nginx auth proxy
-    config["basic_auth_username"] = config["auth_user"]
-    config["basic_auth_password"] = config["auth_password"]
-    del config["auth_user"]
-    del config["auth_password"]
+    if "auth_user" in config:
+        config["basic_auth_username"] = config.pop("auth_user")
+    if "auth_password" in config:
+        config["basic_auth_password"] = config.pop("auth_password")
 
     if "gunicorn_workers" not in config:
         config["gunicorn_workers"] = GUNICORN_WORKERS
@@ -59,9 +75,332 @@ def set_config_defaults(config):
     if "mem_limit" not in config:
         config["mem_limit"] = MEM_LIMIT
 
+    set_proxy_defaults(config)
+
+    if "gunicorn_threads" not in config:
+        config["gunicorn_threads"] = GUNICORN_THREADS
+
+    if "model_memory_budget" not in config:
+        config["model_memory_budget"] = str(
+            int(parse_memory_mib(config["mem_limit"]) * MODEL_MEMORY_SHARE))
+
+    if "idle_timeout" not in config:
+        config["idle_timeout"] = IDLE_TIMEOUT
+
+    if "min_warm_time" not in config:
+        config["min_warm_time"] = MIN_WARM_TIME
+
     config["tagversion"] = config["tag"]
 
     del config["tag"]
 
     upper_config = {k.upper(): v for k, v in config.items()}
     return upper_config
+
+
+def set_proxy_defaults(config):
+    """Sets the default values of the auth proxy config items, scaled to the
+    resources of the model serving container.
+
+    Args:
+        config (dict): config items with the model serving resources already set
+    """
+    if "proxy_cpu_limit" not in config:
+        config["proxy_cpu_limit"] = "{}m".format(max(
+            PROXY_MIN_CPU_LIMIT, int(parse_cpu_millicores(config["cpu_limit"]) * PROXY_CPU_SHARE)))
+
+    if "proxy_cpu_request" not in config:
+        config["proxy_cpu_request"] = "{}m".format(max(
+            PROXY_MIN_CPU_REQUEST,
+            int(parse_cpu_millicores(config["cpu_request"]) * PROXY_CPU_SHARE)))
+
+    if "proxy_mem_request" not in config:
+        config["proxy_mem_request"] = PROXY_MEM_REQUEST
+
+    if "proxy_mem_limit" not in config:
+        config["proxy_mem_limit"] = PROXY_MEM_LIMIT
+
+    if "proxy_worker_processes" not in config:
+        # one nginx worker per available core of the proxy
+        config["proxy_worker_processes"] = str(
+            max(1, math.ceil(parse_cpu_millicores(config["proxy_cpu_limit"]) / 1000)))
+
+    if "proxy_worker_connections" not in config:
+        config["proxy_worker_connections"] = PROXY_WORKER_CONNECTIONS
+
+    if "proxy_upstream_keepalive" not in config:
+        config["proxy_upstream_keepalive"] = PROXY_UPSTREAM_KEEPALIVE
+
+    proxy_buffering = config.get("proxy_buffering", PROXY_BUFFERING)
+    config["proxy_buffering"] = "on" if str(proxy_buffering).lower() in (
+        "on", "true", "1", "yes") else "off"
+
+
+def parse_cpu_millicores(quantity):
+    """Converts an openshift cpu quantity to millicores.
+
+    Args:
+        quantity (str): cpu quantity, e.g. "100m" or "1.5"
+
+    Returns:
+        float: cpu in millicores
+    """
+    if quantity.endswith("m"):
+        return float(quantity[:-1])
+    return float(quantity) * 1000
+
+
+def parse_memory_mib(quantity):
+    """Converts an openshift memory quantity to MiB.
+
+    Args:
+        quantity (str): memory quantity, e.g. "512Mi", "2Gi" or "1G"
+
+    Returns:
+        float: memory in MiB
+    """
+    units = {"Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40,
+             "k": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9, "T": 10 ** 12}
+    for unit, factor in units.items():
+        if quantity.endswith(unit):
+            return float(quantity[:-len(unit)]) * factor / 2 ** 20
+    return float(quantity) / 2 ** 20
+
+
+def pop_warm_up_config(config):
+    """Removes the warm-up items from the config, as they are no template parameters.
+
+    Args:
+        config (dict): config items of the deployment
+
+    Returns:
+        tuple: warm-up enabled (bool), user provided input (pd.DataFrame or None)
+    """
+    warm_up, warm_up_input = (config.pop(key, None) for key in WARM_UP_CONFIG_KEYS)
+    return warm_up_input is not None or is_enabled(warm_up), warm_up_input
+
+
+def is_enabled(value):
+    """Interprets a config item as boolean, as the mlflow CLI passes strings.
+
+    Args:
+        value (object): config item, e.g. True, "true" or "1"
+
+    Returns:
+        bool: True if the config item enables the option
+    """
+    return str(value).lower() in ("true", "1", "yes")
+
+
+def build_warm_up_payload(model_uri, warm_up_input=None):
+    """Builds the request body for warming up a model endpoint. The input is taken
+    from *warm_up_input*, the logged input example or a synthetic row generated
+    from the model signature, in that order.
+
+    Args:
+        model_uri (str): path where to find the mlflow packed model
+        warm_up_input (pd.DataFrame, optional): user provided input. Defaults to None
+
+    Raises:
+        MlflowException: the model has neither an input example nor a signature
+
+    Returns:
+        str: json encoded dataframe in `split` orientation
+    """
+    if warm_up_input is None:
+        model_dir = os.path.dirname(
+            _download_artifact_from_uri(append_to_uri_path(model_uri, "MLmodel")))
+        mlflow_model = Model.load(os.path.join(model_dir, "MLmodel"))
+
+        if mlflow_model.saved_input_example_info is not None:
+            _download_artifact_from_uri(append_to_uri_path(
+                model_uri, mlflow_model.saved_input_example_info["artifact_path"]),
+                output_path=model_dir)
+            warm_up_input = _read_example(mlflow_model, model_dir)
+        elif mlflow_model.signature is not None:
+            inputs = mlflow_model.signature.inputs
+            warm_up_input = pd.DataFrame(
+                [[_SYNTHETIC_VALUES.get(t.name, 0) for t in inputs.column_types()]],
+                columns=inputs.column_names()
+            )
+        else:
+            raise MlflowException(
+                f"Model {model_uri} has neither an input example nor a signature, "
+                "provide the config item warm_up_input for the warm-up."
+            )
+    return json.dumps(warm_up_input.to_dict(orient='split'))
+
+
+_SYNTHETIC_VALUES = {"boolean": False, "string": "", "binary": ""}
+
+
+def get_container(obj_dict, container_name):
+    """Finds a container by its name inside a pod template or pod definition.
+
+    Args:
+        obj_dict (dict): openshift object, i.e. deployment config or pod
+        container_name (str): name of the container
+
+    Raises:
+        MlflowException: no container with that name exists
+
+    Returns:
+        dict: container definition (mutable, part of *obj_dict*)
+    """
+    spec = obj_dict["spec"]
+    if "template" in spec:
+        spec = spec["template"]["spec"]
+    for container in spec["containers"]:
+        if container["name"] == container_name:
+            return container
+    raise MlflowException(f"No container with name {container_name} found")
+
+
+def get_model_uri(dc_dict):
+    """Reads the model uri served by a deployment config.
+
+    Args:
+        dc_dict (dict): containing the deployment config of a mlflow deployment
+
+    Returns:
+        str: path where to find the mlflow packed model
+    """
+    command = get_container(dc_dict, MODEL_SERVING_CONTAINER)["command"]
+    return command[command.index("-m") + 1]
+
+
+def copy_object(obj_dict, name, new_name):
+    """Copies a live openshift object of an application to another application.
+
+    Notes:
+        Fields set by the openshift API server (status, uid, cluster ip, route host,
+        ...) and the `mlflow-openshift/` annotations are left out. Every string equal
+        to *name*, e.g. the object name, labels and selectors, is replaced.
+
+    Args:
+        obj_dict (dict): live openshift object
+        name (str): name of the application the object belongs to
+        new_name (str): name of the new application
+
+    Returns:
+        dict: object that can be created in openshift
+    """
+    metadata = obj_dict["metadata"]
+    copied = {key: value for key, value in obj_dict.items() if key not in ("metadata", "status")}
+    copied["metadata"] = {
+        "name": metadata["name"],
+        "labels": metadata.get("labels", {}),
+        "annotations": {
+            key: value for key, value in metadata.get("annotations", {}).items()
+            if not key.startswith("mlflow-openshift/")
+        }
+    }
+    copied = _replace_strings(copied, name, new_name)
+
+    if copied["kind"] == "Service":
+        copied["spec"].pop("clusterIP", None)
+        copied["spec"].pop("clusterIPs", None)
+    elif copied["kind"] == "Route":
+        copied["spec"].pop("host", None)
+    return copied
+
+
+def _replace_strings(value, old, new):
+    if isinstance(value, dict):
+        return {key: _replace_strings(item, old, new) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_replace_strings(item, old, new) for item in value]
+    return new if value == old else value
+
+
+def diff_objects(live, desired):
+    """Computes the difference between a live openshift object and its desired state.
+
+    Notes:
+        Only fields set in *desired* are compared, so defaults added by the openshift
+        API server are not reported as changes. Lists of dictionaries with a `name`
+        key (containers, env, ports) are matched by name instead of by position.
+        Resource limits and requests are compared by their quantity, e.g. 1000m equals 1.
+        Fields that only exist in the live object are never removed.
+
+    Args:
+        live (dict): object as currently present in openshift, None if absent
+        desired (dict): object as rendered from the template
+
+    Returns:
+        tuple: list of changes as (field path, live value, desired value) and
+            a strategic merge patch (dict) containing only the changed fields
+    """
+    changes = []
+    desired = {k: v for k, v in desired.items() if k not in ("apiVersion", "kind")}
+    patch = _diff_values(live, desired, "", changes)
+    return changes, patch if patch is not _NO_CHANGE else {}
+
+
+_NO_CHANGE = object()
+
+
+def _is_named_list(value):
+    return isinstance(value, list) and len(value) > 0 and all(
+        isinstance(item, dict) and "name" in item for item in value)
+
+
+def _normalize(value):
+    # the API server returns numbers in resources and ports partly as strings
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+_QUANTITY_PATH = re.compile(r"(^|\.)resources\.(limits|requests)\.[^.]+$")
+_QUANTITY = re.compile(r"([+-]?[0-9.]+(?:[eE][+-]?[0-9]+)?)(m|k|M|G|T|P|E|Ki|Mi|Gi|Ti|Pi|Ei)?")
+_QUANTITY_SUFFIXES = {
+    "m": Decimal("0.001"), "": 1,
+    "k": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9, "T": 10 ** 12, "P": 10 ** 15, "E": 10 ** 18,
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40, "Pi": 2 ** 50, "Ei": 2 ** 60
+}
+
+
+def _parse_quantity(value):
+    # the API server stores resource quantities canonical, e.g. 1000m -> 1, 1024Mi -> 1Gi
+    match = _QUANTITY.fullmatch(str(value))
+    if match is None:
+        return None
+    try:
+        return Decimal(match.group(1)) * _QUANTITY_SUFFIXES[match.group(2) or ""]
+    except InvalidOperation:
+        return None
+
+
+def _diff_values(live, desired, path, changes):
+    if isinstance(desired, dict) and isinstance(live, dict):
+        patch = {}
+        for key, value in desired.items():
+            sub_path = f"{path}.{key}" if path else key
+            sub_patch = _diff_values(live.get(key), value, sub_path, changes)
+            if sub_patch is not _NO_CHANGE:
+                patch[key] = sub_patch
+        return patch if patch else _NO_CHANGE
+
+    if _is_named_list(desired) and _is_named_list(live):
+        live_items = {item["name"]: item for item in live}
+        patch = []
+        for item in desired:
+            sub_path = f"{path}[{item['name']}]"
+            if _diff_values(live_items.get(item["name"]), item, sub_path,
+                            changes) is not _NO_CHANGE:
+                # the full item keeps the merge key of the list, e.g. containerPort
+                patch.append(item)
+        return patch if patch else _NO_CHANGE
+
+    if _normalize(live) == _normalize(desired):
+        return _NO_CHANGE
+    if live is None and desired == "":
+        # the API server drops empty strings, e.g. the value of an empty env variable
+        return _NO_CHANGE
+    if _QUANTITY_PATH.search(path) and live is not None and \
+            _parse_quantity(desired) is not None and \
+            _parse_quantity(live) == _parse_quantity(desired):
+        return _NO_CHANGE
+    changes.append((path, live, desired))
+    return desired
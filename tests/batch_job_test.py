@@ -0,0 +1,45 @@
+import unittest
+import random
+import string
+import time
+
+from mlflow.deployments import get_deploy_client
+from mlflow.exceptions import MlflowException
+
+from .config import IMAGE, DOCKER_REGISTRY, TAG, MODEL_URI_1, APP_NAME, \
+    BATCH_INPUT_URI, BATCH_OUTPUT_URI
+
+
+class MLflowBatchJob(unittest.TestCase):
+
+    def setUp(self):
+        target_uri = 'openshift'
+        self.openshift_client = get_deploy_client(target_uri)
+        self.job_name = APP_NAME + ''.join(random.choices(string.ascii_lowercase, k=6))
+        self.config = {
+            "docker_registry": DOCKER_REGISTRY,
+            "image": IMAGE,
+            "tag": TAG,
+            "partitions": "2"
+        }
+
+    def test_missing_config_items(self):
+        with self.assertRaises(MlflowException):
+            self.openshift_client.create_batch_job(
+                self.job_name, MODEL_URI_1, BATCH_INPUT_URI, BATCH_OUTPUT_URI,
+                config={"image": IMAGE}
+            )
+
+    def test_batch_job(self):
+        self.openshift_client.create_batch_job(
+            self.job_name, MODEL_URI_1, BATCH_INPUT_URI, BATCH_OUTPUT_URI, config=self.config)
+
+        res = self.openshift_client.get_batch_job(self.job_name)
+        while res['running']:
+            time.sleep(10)
+            res = self.openshift_client.get_batch_job(self.job_name)
+        self.assertEqual(res['succeeded'], 2)
+        self.assertEqual(self.openshift_client.retry_batch_job(self.job_name), [])
+
+    def tearDown(self):
+        self.openshift_client.delete_deployment(self.job_name)
@@ -5,6 +5,9 @@ import string
 
 from mlflow.deployments import get_deploy_client
 from mlflow.exceptions import MlflowException
+import pandas as pd
+
+from mlflow_openshift.utils import diff_objects, _parse_quantity
 
 from .config import MODEL_URI_1, IMAGE, DOCKER_REGISTRY, TAG, APP_NAME, \
     TEST_USER, TEST_PASSWORD
@@ -49,6 +52,101 @@ class MLflowDeploymentUnitTest(unittest.TestCase):
         os.environ["AWS_ACCESS_KEY_ID"] = self.saved_env
 
 
+class DiffObjectsUnitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.live = {
+            "kind": "DeploymentConfig",
+            "metadata": {"name": "model", "uid": "1234", "resourceVersion": "42"},
+            "spec": {
+                "replicas": 1,
+                "revisionHistoryLimit": 10,
+                "template": {"spec": {"containers": [
+                    {
+                        "name": "auth-proxy",
+                        "image": "nginx",
+                        "env": [{"name": "BASIC_AUTH_USERNAME", "value": "user"}],
+                        "terminationMessagePath": "/dev/termination-log"
+                    },
+                    {
+                        "name": "model-serving",
+                        "image": "registry/image:1",
+                        "env": [
+                            {"name": "MODEL_URI", "value": "s3://models/1"},
+                            {"name": "EMPTY"}
+                        ],
+                        "resources": {
+                            "limits": {"cpu": "1", "memory": "1Gi"},
+                            "requests": {"cpu": "100m", "memory": "512Mi"}
+                        }
+                    }
+                ]}}
+            },
+            "status": {"latestVersion": 3}
+        }
+        self.desired = {
+            "apiVersion": "v1",
+            "kind": "DeploymentConfig",
+            "metadata": {"name": "model"},
+            "spec": {
+                "replicas": 1,
+                "template": {"spec": {"containers": [
+                    {
+                        "name": "model-serving",
+                        "image": "registry/image:1",
+                        "env": [
+                            {"name": "EMPTY", "value": ""},
+                            {"name": "MODEL_URI", "value": "s3://models/1"}
+                        ],
+                        "resources": {
+                            "limits": {"cpu": "1000m", "memory": "1024Mi"},
+                            "requests": {"cpu": "0.1", "memory": "512Mi"}
+                        }
+                    },
+                    {
+                        "name": "auth-proxy",
+                        "image": "nginx",
+                        "env": [{"name": "BASIC_AUTH_USERNAME", "value": "user"}]
+                    }
+                ]}}
+            }
+        }
+
+    def test_unchanged(self):
+        # server defaults, equal quantities, empty env values and the order of
+        # containers and env variables are no changes
+        changes, patch = diff_objects(self.live, self.desired)
+        self.assertEqual(changes, [])
+        self.assertEqual(patch, {})
+
+    def test_changed_env_matched_by_name(self):
+        self.desired["spec"]["template"]["spec"]["containers"][0]["env"][1]["value"] = \
+            "s3://models/2"
+        changes, patch = diff_objects(self.live, self.desired)
+
+        self.assertEqual(
+            [field for field, _, _ in changes],
+            ["spec.template.spec.containers[model-serving].env[MODEL_URI].value"])
+        containers = patch["spec"]["template"]["spec"]["containers"]
+        self.assertEqual([container["name"] for container in containers], ["model-serving"])
+
+    def test_changed_quantity(self):
+        self.desired["spec"]["template"]["spec"]["containers"][0]["resources"]["limits"][
+            "memory"] = "2Gi"
+        changes, _ = diff_objects(self.live, self.desired)
+        self.assertEqual(
+            changes,
+            [("spec.template.spec.containers[model-serving].resources.limits.memory",
+              "1Gi", "2Gi")])
+
+    def test_parse_quantity(self):
+        self.assertEqual(_parse_quantity("1000m"), _parse_quantity("1"))
+        self.assertEqual(_parse_quantity("1024Mi"), _parse_quantity("1Gi"))
+        self.assertEqual(_parse_quantity("1k"), _parse_quantity("1e3"))
+        self.assertNotEqual(_parse_quantity("1G"), _parse_quantity("1Gi"))
+        self.assertIsNone(_parse_quantity("one"))
+
+
 # succesful deployment is already part of all other integration tests
 class MLflowDeploymentCreateError(unittest.TestCase):
 
@@ -86,3 +184,112 @@ class MLflowDeploymentCreateError(unittest.TestCase):
                     "auth_password": TEST_PASSWORD
                 }
             )
+
+
+class MLflowDeploymentWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        target_uri = 'openshift'
+        self.openshift_client = get_deploy_client(target_uri)
+        self.deployment_name = APP_NAME + ''.join(random.choices(string.ascii_lowercase, k=6))
+
+    def test_create_deployment_warm_up(self):
+        res = self.openshift_client.create_deployment(
+            self.deployment_name,
+            MODEL_URI_1,
+            config={
+                "docker_registry": DOCKER_REGISTRY,
+                "image": IMAGE,
+                "tag": TAG,
+                "auth_user": TEST_USER,
+                "auth_password": TEST_PASSWORD,
+                "warm_up": "true",
+                "warm_up_input": pd.DataFrame(
+                    columns=["sepalLength", "sepalWidth", "petalWidth"],
+                    data=[[0, 1, 0]]
+                )
+            }
+        )
+        self.assertEqual(len(res['warm_up']['pods']), 1)
+
+    def tearDown(self):
+        self.openshift_client.delete_deployment(self.deployment_name)
+
+
+class MLflowDeploymentPrePull(unittest.TestCase):
+
+    def setUp(self):
+        target_uri = 'openshift'
+        self.openshift_client = get_deploy_client(target_uri)
+        self.deployment_name = APP_NAME + ''.join(random.choices(string.ascii_lowercase, k=6))
+
+    def test_create_deployment_pre_pull(self):
+        res = self.openshift_client.create_deployment(
+            self.deployment_name,
+            MODEL_URI_1,
+            config={
+                "docker_registry": DOCKER_REGISTRY,
+                "image": IMAGE,
+                "tag": TAG,
+                "auth_user": TEST_USER,
+                "auth_password": TEST_PASSWORD,
+                "pre_pull": "true"
+            }
+        )
+        self.assertIn('pre_pull', res)
+
+    def tearDown(self):
+        self.openshift_client.delete_deployment(self.deployment_name)
+
+
+class MLflowDeploymentWithoutAuthProxy(unittest.TestCase):
+
+    def setUp(self):
+        target_uri = 'openshift'
+        self.openshift_client = get_deploy_client(target_uri)
+        self.deployment_name = APP_NAME + ''.join(random.choices(string.ascii_lowercase, k=6))
+
+    def test_create_deployment_without_auth_proxy(self):
+        self.openshift_client.create_deployment(
+            self.deployment_name,
+            MODEL_URI_1,
+            config={
+                "docker_registry": DOCKER_REGISTRY,
+                "image": IMAGE,
+                "tag": TAG,
+                "auth_proxy": "false"
+            }
+        )
+        df = pd.DataFrame(
+            columns=["sepalLength", "sepalWidth", "petalWidth"],
+            data=[[0, 1, 0], [0, 1, 1]]
+        )
+        res = self.openshift_client.predict(self.deployment_name, df)
+        self.assertEqual(len(res), 2)
+
+    def test_switch_auth_proxy(self):
+        self.openshift_client.create_deployment(
+            self.deployment_name,
+            MODEL_URI_1,
+            config={
+                "docker_registry": DOCKER_REGISTRY,
+                "image": IMAGE,
+                "tag": TAG,
+                "auth_proxy": "false"
+            }
+        )
+        with self.assertRaises(MlflowException):
+            self.openshift_client.create_deployment(
+                self.deployment_name,
+                MODEL_URI_1,
+                config={
+                    "docker_registry": DOCKER_REGISTRY,
+                    "image": IMAGE,
+                    "tag": TAG,
+                    "auth_user": TEST_USER,
+                    "auth_password": TEST_PASSWORD
+                }
+            )
+
+    def tearDown(self):
+        self.openshift_client.delete_deployment(self.deployment_name)
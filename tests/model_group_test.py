@@ -0,0 +1,51 @@
+import unittest
+import random
+import string
+
+from mlflow.deployments import get_deploy_client
+from mlflow.exceptions import MlflowException
+import pandas as pd
+
+from .config import IMAGE, DOCKER_REGISTRY, TAG, MODEL_URI_1, MODEL_URI_2, APP_NAME, \
+    TEST_USER, TEST_PASSWORD
+
+
+class MLflowModelGroup(unittest.TestCase):
+
+    def setUp(self):
+        target_uri = 'openshift'
+        self.openshift_client = get_deploy_client(target_uri)
+        self.group_name = APP_NAME + ''.join(random.choices(string.ascii_lowercase, k=6))
+
+        self.openshift_client.create_model_group(
+            self.group_name,
+            {"first": MODEL_URI_1},
+            config={
+                "docker_registry": DOCKER_REGISTRY,
+                "image": IMAGE,
+                "tag": TAG,
+                "auth_user": TEST_USER,
+                "auth_password": TEST_PASSWORD
+            }
+        )
+        self.df = pd.DataFrame(
+            columns=["sepalLength", "sepalWidth", "petalWidth"],
+            data=[[0, 1, 0], [0, 1, 1]]
+        )
+
+    def test_predict_model_in_group(self):
+        res = self.openshift_client.predict(self.group_name + "/first", self.df)
+        self.assertEqual(len(res), 2)
+
+    def test_add_and_remove_model(self):
+        models = self.openshift_client.add_model(self.group_name, "second", MODEL_URI_2)
+        self.assertEqual(models, {"first": MODEL_URI_1, "second": MODEL_URI_2})
+
+        models = self.openshift_client.remove_model(self.group_name, "second")
+        self.assertEqual(models, {"first": MODEL_URI_1})
+
+        with self.assertRaises(MlflowException):
+            self.openshift_client.remove_model(self.group_name, "second")
+
+    def tearDown(self):
+        self.openshift_client.delete_deployment(self.group_name)
@@ -3,11 +3,14 @@ import random
 import string
 
 from mlflow.deployments import get_deploy_client
+from mlflow.exceptions import MlflowException
 import pandas as pd
 
 import numpy as np
 from numpy.testing import assert_array_equal
 
+from mlflow_openshift.request_helper import RequestPolicy
+
 from .config import IMAGE, DOCKER_REGISTRY, TAG, MODEL_URI_1, APP_NAME, \
     TEST_USER, TEST_PASSWORD
 
@@ -40,5 +43,15 @@ class MLflowDeploymenPredict(unittest.TestCase):
         res = self.openshift_client.predict(self.deployment_name, df)
         assert_array_equal(res, np.array([0, 0]))
 
+    def test_predict_timeout(self):
+        df = pd.DataFrame(
+            columns=["sepalLength", "sepalWidth", "petalWidth"],
+            data=[[0, 1, 0], [0, 1, 1]]
+        )
+
+        self.openshift_client.request_policy = RequestPolicy(read_timeout=0.0001)
+        with self.assertRaises(MlflowException):
+            self.openshift_client.predict(self.deployment_name, df)
+
     def tearDown(self):
         self.openshift_client.delete_deployment(self.deployment_name)
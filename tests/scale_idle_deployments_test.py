@@ -0,0 +1,47 @@
+import unittest
+import random
+import string
+import time
+
+from mlflow.deployments import get_deploy_client
+import pandas as pd
+
+from .config import IMAGE, DOCKER_REGISTRY, TAG, MODEL_URI_1, APP_NAME, \
+    TEST_USER, TEST_PASSWORD
+
+
+class MLflowDeploymentScaleIdle(unittest.TestCase):
+
+    def setUp(self):
+        target_uri = 'openshift'
+        self.openshift_client = get_deploy_client(target_uri)
+        self.deployment_name = APP_NAME + ''.join(random.choices(string.ascii_lowercase, k=6))
+
+        self.openshift_client.create_deployment(
+            self.deployment_name,
+            MODEL_URI_1,
+            config={
+                "docker_registry": DOCKER_REGISTRY,
+                "image": IMAGE,
+                "tag": TAG,
+                "auth_user": TEST_USER,
+                "auth_password": TEST_PASSWORD,
+                "idle_timeout": "1",
+                "min_warm_time": "0"
+            }
+        )
+
+    def test_scale_idle_and_wake(self):
+        time.sleep(2)
+        res = self.openshift_client.scale_idle_deployments()
+        self.assertIn(self.deployment_name, res)
+
+        df = pd.DataFrame(
+            columns=["sepalLength", "sepalWidth", "petalWidth"],
+            data=[[0, 1, 0], [0, 1, 1]]
+        )
+        res = self.openshift_client.predict(self.deployment_name, df)
+        self.assertEqual(len(res), 2)
+
+    def tearDown(self):
+        self.openshift_client.delete_deployment(self.deployment_name)
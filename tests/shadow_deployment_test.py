@@ -0,0 +1,82 @@
+import unittest
+import random
+import string
+
+from mlflow.deployments import get_deploy_client
+from mlflow.exceptions import MlflowException
+import pandas as pd
+import openshift as oc
+
+from .config import IMAGE, DOCKER_REGISTRY, MODEL_URI_1, TAG, \
+    APP_NAME, MODEL_URI_2, TEST_USER, TEST_PASSWORD
+
+
+class MLflowShadowDeployment(unittest.TestCase):
+
+    def setUp(self):
+        target_uri = 'openshift'
+        self.openshift_client = get_deploy_client(target_uri)
+        self.deployment_name = APP_NAME + ''.join(random.choices(string.ascii_lowercase, k=6))
+
+        self.openshift_client.create_deployment(
+            self.deployment_name,
+            MODEL_URI_1,
+            config={
+                "docker_registry": DOCKER_REGISTRY,
+                "image": IMAGE,
+                "tag": TAG,
+                "auth_user": TEST_USER,
+                "auth_password": TEST_PASSWORD
+            }
+        )
+        self.df = pd.DataFrame(
+            columns=["sepalLength", "sepalWidth", "petalWidth"],
+            data=[[0, 1, 0], [0, 1, 1]]
+        )
+
+    def test_shadow_report(self):
+        res = self.openshift_client.create_shadow(
+            self.deployment_name,
+            MODEL_URI_2,
+            config={"share": 1, "min_requests": 5}
+        )
+        self.assertEqual(res['candidate'], self.deployment_name + "-shadow")
+
+        for _ in range(10):
+            self.openshift_client.predict(self.deployment_name, self.df)
+        self.openshift_client.shadow_comparisons[self.deployment_name]._executor.shutdown()
+
+        report = self.openshift_client.get_shadow_report(self.deployment_name)
+        self.assertEqual(report['live']['requests'], 10)
+        self.assertEqual(report['shadow']['requests'], 10)
+        self.assertEqual(report['predictions']['rows'], 20)
+        self.assertIn('promote', report)
+
+    def test_shadow_twice(self):
+        self.openshift_client.create_shadow(self.deployment_name, MODEL_URI_2)
+        with self.assertRaises(MlflowException):
+            self.openshift_client.create_shadow(self.deployment_name, MODEL_URI_2)
+
+    def test_promote_shadow(self):
+        self.openshift_client.create_shadow(self.deployment_name, MODEL_URI_2)
+        self.openshift_client.promote_shadow(self.deployment_name)
+
+        res = self.openshift_client.update_deployment(
+            self.deployment_name,
+            model_uri=MODEL_URI_2,
+        )
+        self.assertEqual(res['changes'], [])
+        self.assertEqual(
+            oc.selector("dc", labels={"app": self.deployment_name + "-shadow"}).names(), [])
+
+    def test_delete_shadow(self):
+        self.openshift_client.create_shadow(self.deployment_name, MODEL_URI_2)
+        self.openshift_client.delete_shadow(self.deployment_name)
+
+        with self.assertRaises(MlflowException):
+            self.openshift_client.get_shadow_report(self.deployment_name)
+        self.assertEqual(
+            oc.selector("dc", labels={"app": self.deployment_name + "-shadow"}).names(), [])
+
+    def tearDown(self):
+        self.openshift_client.delete_deployment(self.deployment_name)
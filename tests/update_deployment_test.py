@@ -39,6 +39,13 @@ class MLflowDeploymenUpdate(unittest.TestCase):
             raised = True
         self.assertFalse(raised)
 
+    def test_update_deployment_unchanged(self):
+        res = self.openshift_client.update_deployment(
+            self.deployment_name,
+            model_uri=MODEL_URI_1,
+        )
+        self.assertEqual(res['changes'], [])
+
     def test_update_deployment_pod_error(self):
         with self.assertRaises(MlflowException) as error:
             _ = self.openshift_client.update_deployment(